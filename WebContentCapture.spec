@@ -0,0 +1,77 @@
+# -*- mode: python ; coding: utf-8 -*-
+# PyInstaller spec for the Web-Content-Capture-MVP macOS app, built with: python osbot_pyqt6/build_macos.py
+# (APP_NAME / APP_IDENTIFIER / APP_VERSION below must match the ones in osbot_pyqt6/build_macos.py)
+import os
+
+APP_NAME       = 'Web-Content-Capture-MVP'
+APP_IDENTIFIER = 'com.osbot.webcapture'
+APP_VERSION    = '1.0.0'
+
+PROJECT_ROOT   = SPECPATH
+OSBOT_DIR      = os.path.join(PROJECT_ROOT, 'osbot_pyqt6')
+ICON_PATH      = os.path.join(PROJECT_ROOT, 'assets', 'app_icon.icns')
+ICON           = [ICON_PATH] if os.path.exists(ICON_PATH) else None
+
+# Modules the app never uses: keeping them out shrinks the bundle and the number of files to sign
+excludes = [
+    'PyQt6.Qt3DCore',
+    'PyQt6.QtQuick',
+    'PyQt6.QtMultimedia',
+    'PyQt6.QtDesigner',
+    'PyQt6.QtTest',
+    'mitmproxy.tools.console',
+    'mitmproxy.tools.web',
+    'tkinter',
+    'test',
+    'onnxruntime',
+]
+
+# Package submodules, data files (sources, version, json) and dynamically loaded imports come from pyinstaller_hooks/hook-osbot_pyqt6.py
+a = Analysis(
+    [os.path.join(OSBOT_DIR, 'main_app.py')],
+    pathex=[OSBOT_DIR, PROJECT_ROOT],
+    binaries=[],
+    datas=[],
+    hiddenimports=['osbot_pyqt6'],
+    hookspath=[os.path.join(PROJECT_ROOT, 'pyinstaller_hooks')],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=excludes,
+    noarchive=False,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name=APP_NAME,
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=False,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+    icon=ICON,
+)
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name=APP_NAME,
+)
+app = BUNDLE(
+    coll,
+    name=f'{APP_NAME}.app',
+    icon=ICON,
+    bundle_identifier=APP_IDENTIFIER,
+    version=APP_VERSION,
+)
@@ -13,13 +13,26 @@ python build_macos.py [--sign]
 
 Options:
 --sign: Sign the application with your Apple Developer certificate
+--force-rebuild: Discard PyInstaller's cached analysis and rebuild from scratch
+--skip-install: Don't check or install the build dependencies
+--release: Release build (compressed DMG and timestamped signatures, dev builds skip both)
+
+Environment:
+OSBOT_SKIP_DEPS=1: Don't check or install the build dependencies (e.g. in a pre-provisioned CI environment)
 """
 
 import os
+import compileall
 import subprocess
 import argparse
 import shutil
+import hashlib
+import importlib.metadata
+import re
 import platform
+import shlex
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Ensure we're on macOS
@@ -31,6 +44,9 @@ if platform.system() != "Darwin":
 parser = argparse.ArgumentParser(description="Build macOS application for Web-Content-Capture-MVP")
 parser.add_argument("--sign", action="store_true", help="Sign the application with an Apple Developer certificate")
 parser.add_argument("--cert-name", type=str, default=None, help="Certificate name to use for signing")
+parser.add_argument("--skip-install", action="store_true", help="Don't check or install the build dependencies")
+parser.add_argument("--release", action="store_true", help="Release build: compress the DMG and request a secure timestamp when signing")
+parser.add_argument("--force-rebuild", action="store_true", help="Discard PyInstaller's cached analysis and rebuild from scratch")
 args = parser.parse_args()
 
 # Project directories
@@ -48,6 +64,22 @@ DIST_DIR = PROJECT_ROOT / "dist"
 BUILD_DIR = PROJECT_ROOT / "build"
 ASSETS_DIR = PROJECT_ROOT / "assets"
 
+# Build dependencies: the hash-locked file (pip-compile --generate-hashes build-requirements.in) is used when present
+BUILD_REQUIREMENTS = PROJECT_ROOT / "build-requirements.in"
+BUILD_REQUIREMENTS_LOCK = PROJECT_ROOT / "build-requirements.lock"
+DEPS_STAMP_FILE = BUILD_DIR / ".deps.sha256"               # requirements file + installed distributions
+
+# Output of every command run by this script, written as it is produced (only its tail is echoed to the
+# terminal when a command fails). Commands run in parallel (codesign batches) share it, so their lines may interleave
+BUILD_LOG_FILE = BUILD_DIR / "last-build.log"
+BUILD_LOG_TAIL_LINES = 50
+
+# Checked-in PyInstaller spec (it also lists the hooks dir, the data files and the excluded modules)
+PYINSTALLER_SPEC_FILE = PROJECT_ROOT / "WebContentCapture.spec"
+
+# PyInstaller's analysis cache is kept between builds (CI persists it with actions/cache)
+PYINSTALLER_WORK_DIR = Path.home() / "Library" / "Caches" / "osbot_pyqt6" / "pyinstaller-work"
+
 # Create necessary directories
 os.makedirs(DIST_DIR, exist_ok=True)
 os.makedirs(ASSETS_DIR, exist_ok=True)
@@ -57,183 +89,203 @@ APP_NAME = "Web-Content-Capture-MVP"
 APP_IDENTIFIER = "com.osbot.webcapture"
 APP_VERSION = "1.0.0"
 
+DMG_PATH = DIST_DIR / f"{APP_NAME.replace(' ', '-')}-{APP_VERSION}.dmg"
+APP_DIGEST_FILE = BUILD_DIR / ".app.digest"
 
-def run_command(command, error_msg=None):
-    """Run a shell command and handle errors"""
-    try:
-        print(f"Running: {' '.join(command)}")
-        subprocess.run(command, check=True)
+
+def build_log_tail(line_count=BUILD_LOG_TAIL_LINES):
+    """The last lines of BUILD_LOG_FILE"""
+    with open(BUILD_LOG_FILE, errors="replace") as log_file:
+        return "".join(deque(log_file, maxlen=line_count))
+
+
+def run_command(command, error_msg=None, env=None):
+    """Run a shell command and handle errors (its output is streamed into BUILD_LOG_FILE, whose tail is printed on failure)"""
+    print("Running:", shlex.join(command))
+    with open(BUILD_LOG_FILE, "a") as log_file:             # append mode: every write lands at the current end of the file
+        log_file.write(f"$ {shlex.join(command)}\n")
+        log_file.flush()
+        result = subprocess.run(command, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+    if result.returncode == 0:
         return True
-    except subprocess.CalledProcessError as e:
-        if error_msg:
-            print(f"ERROR: {error_msg}")
-        print(f"Command failed with exit code {e.returncode}: {e}")
-        return False
+    print(build_log_tail())
+    if error_msg:
+        print(f"ERROR: {error_msg}")
+    print(f"Command failed with exit code {result.returncode}: {shlex.join(command)}")
+    return False
+
+
+def run_commands_parallel(commands, error_msg=None):
+    """Run independent shell commands concurrently, returns True if all of them succeeded"""
+    if not commands:
+        return True
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = list(executor.map(lambda command: run_command(command, error_msg), commands))
+    return all(results)
+
+
+def split_into_batches(items, batch_count):
+    """Split items into at most batch_count interleaved batches of similar size"""
+    return [items[index::batch_count] for index in range(min(batch_count, len(items)))]
+
+
+def normalize_distribution_name(name):
+    """PEP 503 normalized form of a distribution name (e.g. PyQt6_WebEngine -> pyqt6-webengine)"""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def missing_requirements(requirements_file):
+    """Requirement lines of requirements_file not satisfied by the installed distributions (pinned versions must match)"""
+    installed = {normalize_distribution_name(dist.metadata["Name"]): dist.version
+                 for dist in importlib.metadata.distributions()
+                 if dist.metadata["Name"]}
+    missing = []
+    for line in requirements_file.read_text().splitlines():
+        requirement = line.split("#", 1)[0].split(";", 1)[0].strip().rstrip("\\").strip()
+        if not requirement or requirement.startswith("-"):
+            continue
+        match = re.match(r"([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*(?:==\s*([^\s,]+))?", requirement)
+        if not match:
+            continue
+        name, pinned_version = normalize_distribution_name(match.group(1)), match.group(2)
+        if name not in installed or (pinned_version and installed[name] != pinned_version):
+            missing.append(requirement)
+    return missing
+
+
+def dependencies_fingerprint(requirements_file):
+    """sha256 of the requirements file and of every installed distribution (what pip freeze would list)"""
+    installed = sorted(f"{normalize_distribution_name(dist.metadata['Name'])}=={dist.version}"
+                       for dist in importlib.metadata.distributions()
+                       if dist.metadata["Name"])
+    digest = hashlib.sha256(requirements_file.read_bytes())
+    digest.update("\n".join(installed).encode())
+    return digest.hexdigest()
 
 
 def install_dependencies():
-    """Install required dependencies"""
-    dependencies = [
-        "PyQt6",
-        "PyQt6-WebEngine",
-        "fastapi",
-        "uvicorn[standard]",
-        "pyinstaller",
-        "python-multipart",
-        "starlette",
-        "pydantic",
-        "mitmproxy",
-        "requests",
-        "osbot-utils"
-    ]
+    """Install required dependencies (skipped when neither the requirements file nor the environment changed since
+       the last install, when the environment already has them, or with --skip-install / OSBOT_SKIP_DEPS=1)"""
+    if args.skip_install or os.environ.get("OSBOT_SKIP_DEPS") == "1":
+        print("Skipping dependency installation")
+        return True
+
+    if BUILD_REQUIREMENTS_LOCK.exists():
+        requirements_file = BUILD_REQUIREMENTS_LOCK
+        cmd = ["pip", "install", "--no-deps", "--require-hashes", "--prefer-binary", "-r", str(requirements_file)]
+    else:
+        requirements_file = BUILD_REQUIREMENTS
+        cmd = ["pip", "install", "--prefer-binary", "-r", str(requirements_file)]
 
-    print("Installing dependencies...")
-    cmd = ["pip", "install"] + dependencies
-    return run_command(cmd, "Failed to install dependencies")
+    requirements_hash = dependencies_fingerprint(requirements_file)
+    if DEPS_STAMP_FILE.exists() and DEPS_STAMP_FILE.read_text().strip() == requirements_hash:
+        print(f"Dependencies up to date with {requirements_file.name}, skipping pip install")
+        return True
+
+    # A pre-provisioned virtualenv (or a CI cache hit) usually has everything already
+    missing = missing_requirements(requirements_file)
+    if not missing:
+        print("All dependencies present, skipping pip install")
+        os.makedirs(BUILD_DIR, exist_ok=True)
+        DEPS_STAMP_FILE.write_text(requirements_hash)
+        return True
+
+    # the hash-locked install has to go through the whole lock file, the unpinned one only needs what is missing
+    if requirements_file == BUILD_REQUIREMENTS:
+        cmd = ["pip", "install", "--prefer-binary"] + missing
+
+    print(f"Installing dependencies from {requirements_file.name}...")
+    if not run_command(cmd, "Failed to install dependencies"):
+        return False
+
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    DEPS_STAMP_FILE.write_text(dependencies_fingerprint(requirements_file))       # the environment changed with the install
+    return True
 
 
 def create_icon():
-    """Create a placeholder icon if it doesn't exist"""
-    icon_path = ASSETS_DIR / "app_icon.icns"
-    if not icon_path.exists():
-        print("Creating placeholder icon...")
-        # Create a simple icon using iconutil (macOS built-in)
-        iconset_path = ASSETS_DIR / "app_icon.iconset"
-        os.makedirs(iconset_path, exist_ok=True)
-
-        # Create placeholder PNG files for different sizes
-        sizes = [16, 32, 64, 128, 256, 512]
-        for size in sizes:
-            # You can replace this with actual icon generation
-            print(f"  - Would create {size}x{size} icon")
-
-        print("WARNING: No app icon found. A default icon will be used.")
+    """Generate app_icon.icns from assets/app_icon_source.png (skipped when the .icns is newer than the source)"""
+    icon_path   = ASSETS_DIR / "app_icon.icns"
+    source_path = ASSETS_DIR / "app_icon_source.png"
+
+    src_mtime = max((path.stat().st_mtime for path in ASSETS_DIR.glob("app_icon_source.*")), default=0)
+    dst_mtime = icon_path.stat().st_mtime if icon_path.exists() else 0
+    if dst_mtime >= src_mtime:
+        if not icon_path.exists():
+            print("WARNING: No app icon found. A default icon will be used.")
+        return icon_path
+
+    print("Creating app icon...")
+    iconset_path = ASSETS_DIR / "app_icon.iconset"
+    os.makedirs(iconset_path, exist_ok=True)
+
+    # iconutil expects each size at 1x and 2x (e.g. icon_16x16.png and icon_16x16@2x.png)
+    sizes    = [16, 32, 128, 256, 512]
+    commands = []
+    for size in sizes:
+        for scale, suffix in ((1, ""), (2, "@2x")):
+            pixels = size * scale
+            output = iconset_path / f"icon_{size}x{size}{suffix}.png"
+            commands.append(["sips", "-z", str(pixels), str(pixels), str(source_path), "--out", str(output)])
+
+    # sips resizes to a single size per call, so the resizes run side by side instead of one after the other
+    if run_commands_parallel(commands, "Failed to resize app icon"):
+        run_command(["iconutil", "-c", "icns", str(iconset_path), "-o", str(icon_path)], "Failed to create app icon")
+    shutil.rmtree(iconset_path, ignore_errors=True)
 
     return icon_path
 
 
+def precompile_sources():
+    """Byte-compile the package once with -OO so PyInstaller picks up the optimized .pyc instead of recompiling"""
+    # The .opt-2.pyc files sit next to the regular ones without replacing them (an -OO interpreter only ever loads
+    # the opt-2 variants), so the bytecode cache used by normal development and test runs is left alone
+    return compileall.compile_dir(str(OSBOT_DIR), quiet=1, optimize=2, workers=0)
+
+
 def build_app_with_pyinstaller():
     """Build the application using PyInstaller"""
     print(f"Building {APP_NAME} with PyInstaller...")
 
-    # Clean previous builds
+    # Clean previous builds (the PyInstaller work dir is kept so its analysis cache can be reused,
+    # and the DMG is kept so it can be reused when the rebuilt app is identical)
     if DIST_DIR.exists():
-        shutil.rmtree(DIST_DIR)
-    if BUILD_DIR.exists():
-        shutil.rmtree(BUILD_DIR)
-
-    # Icon path
-    icon_path = create_icon()
-
-    # PyInstaller command
+        for item in DIST_DIR.iterdir():
+            if item == DMG_PATH:
+                continue
+            if item.is_dir() and not item.is_symlink():
+                shutil.rmtree(item)
+            else:
+                item.unlink()
+    if args.force_rebuild and PYINSTALLER_WORK_DIR.exists():
+        shutil.rmtree(PYINSTALLER_WORK_DIR)
+
+    # The spec picks up assets/app_icon.icns when it exists (already up to date when main() prepared it)
+    create_icon()
+
+    # Asserts and docstrings are stripped from the bundled bytecode, which shrinks the PYZ loaded at every start
+    precompile_sources()
+    env = os.environ.copy()
+    env["PYTHONOPTIMIZE"] = "2"
+
+    # PyInstaller command (everything else is in the spec file)
     cmd = [
         "pyinstaller",
-        "--name", APP_NAME,  # Keep spaces in name for proper .app bundle
-        "--windowed",
-        "--onedir",  # Use onedir for .app bundle
-        "--clean",
         "--noconfirm",
         "--distpath", str(DIST_DIR),
-        "--workpath", str(BUILD_DIR),
-        "--specpath", str(PROJECT_ROOT),
-        "--osx-bundle-identifier", APP_IDENTIFIER,
+        "--workpath", str(PYINSTALLER_WORK_DIR),
     ]
 
-    # Add paths for imports
-    cmd.extend(["--paths", str(OSBOT_DIR)])
-    cmd.extend(["--paths", str(PROJECT_ROOT)])
-
-    # Add data files
-    data_files = [
-        # Main application files
-        (str(OSBOT_DIR / "server.py"), "osbot_pyqt6"),
-        (str(OSBOT_DIR / "start_mitmproxy.py"), "osbot_pyqt6"),
-        (str(OSBOT_DIR / "content_replacer.py"), "osbot_pyqt6"),
-        (str(OSBOT_DIR / "aggressive_ssl_bypass.py"), "osbot_pyqt6"),
-        (str(OSBOT_DIR / "main_app.py"), "osbot_pyqt6"),
-        (str(OSBOT_DIR / "__init__.py"), "osbot_pyqt6"),
-
-        # Utils folder
-        (str(OSBOT_DIR / "utils" / "__init__.py"), "osbot_pyqt6/utils"),
-        (str(OSBOT_DIR / "utils" / "Version.py"), "osbot_pyqt6/utils"),
-    ]
+    if args.force_rebuild:
+        cmd.append("--clean")
 
-    # Add version file if it exists
-    version_file = OSBOT_DIR / "version"
-    if version_file.exists():
-        data_files.append((str(version_file), "osbot_pyqt6"))
-
-    # Check all files exist before adding
-    for src, dst in data_files:
-        if not Path(src).exists():
-            print(f"WARNING: File not found: {src}")
-        else:
-            cmd.extend(["--add-data", f"{src}:{dst}"])
-
-    # Collect all imports from the project
-    cmd.extend(["--collect-all", "osbot_pyqt6"])
-
-    # Add hidden imports
-    hidden_imports = [
-        # Standard imports
-        "uvicorn.logging",
-        "uvicorn.loops",
-        "uvicorn.loops.auto",
-        "uvicorn.protocols",
-        "uvicorn.protocols.http",
-        "uvicorn.protocols.http.auto",
-        "uvicorn.lifespan",
-        "uvicorn.lifespan.on",
-        "fastapi",
-        "starlette",
-        "mitmproxy",
-        "mitmproxy.tools",
-        "mitmproxy.tools.dump",
-        "mitmproxy.http",
-        "mitmproxy.options",
-        "mitmproxy.master",
-        "mitmproxy.ctx",
-        "osbot_utils",
-        "osbot_utils.type_safe",
-        "osbot_utils.type_safe.Type_Safe",
-        "osbot_utils.utils",
-        "osbot_utils.utils.Files",
-        "osbot_utils.helpers",
-        "osbot_utils.helpers.duration",
-        "osbot_utils.helpers.duration.decorators",
-        "osbot_utils.helpers.duration.decorators.capture_duration",
-        # PyQt6 specific
-        "PyQt6.QtWidgets",
-        "PyQt6.QtCore",
-        "PyQt6.QtGui",
-        "PyQt6.QtWebEngineWidgets",
-        "PyQt6.QtWebEngineCore",
-        "PyQt6.QtNetwork",
-        # Python standard library that might be needed
-        "asyncio",
-        "threading",
-        "json",
-        "pathlib",
-        "tempfile",
-        "signal",
-        "atexit",
-    ]
-
-    for imp in hidden_imports:
-        cmd.extend(["--hidden-import", imp])
-
-    # Add icon if available
-    if icon_path.exists():
-        cmd.extend(["--icon", str(icon_path)])
-
-    # Add the main script
-    cmd.append(str(OSBOT_DIR / "main_app.py"))
+    cmd.append(str(PYINSTALLER_SPEC_FILE))
 
     # Run PyInstaller
     print("Running PyInstaller with command:")
-    print(" ".join(cmd))
+    print(shlex.join(cmd))
 
-    success = run_command(cmd, "PyInstaller build failed")
+    success = run_command(cmd, "PyInstaller build failed", env=env)
 
     if success:
         print("Build completed, checking output...")
@@ -252,46 +304,67 @@ def build_app_with_pyinstaller():
                         for exe in macos_dir.iterdir():
                             print(f"      - {exe.name}")
 
-    # Clean up spec file if it exists
-    spec_file = PROJECT_ROOT / f"{APP_NAME}.spec"
-    if spec_file.exists():
-        os.remove(spec_file)
-
     return success
 
 
-def sign_application(cert_name):
+def find_signables(root):
+    """Collect the .framework folders and .dylib files under root in a single walk"""
+    frameworks, dylibs = [], []
+    for dir_path, dir_names, file_names in os.walk(root):
+        for dir_name in dir_names:
+            if dir_name.endswith(".framework"):
+                frameworks.append(os.path.join(dir_path, dir_name))
+        for file_name in file_names:
+            if file_name.endswith(".dylib"):
+                dylibs.append(os.path.join(dir_path, file_name))
+    return frameworks, dylibs
+
+
+# Where PyInstaller may have put the app bundle
+POSSIBLE_APP_LOCATIONS = [
+    DIST_DIR / f"{APP_NAME}.app",
+    DIST_DIR / f"{APP_NAME.replace(' ', '')}.app",
+    DIST_DIR / APP_NAME.replace(" ", "") / f"{APP_NAME}.app",
+    DIST_DIR / APP_NAME.replace(" ", "") / f"{APP_NAME.replace(' ', '')}.app",
+]
+
+
+def find_app_bundle():
+    """Return the first location in POSSIBLE_APP_LOCATIONS that exists (or None)"""
+    for location in POSSIBLE_APP_LOCATIONS:
+        if os.path.lexists(location):
+            return location
+    return None
+
+
+def sign_application(cert_name, app_path):
     """Sign the application with an Apple Developer certificate"""
     print(f"Signing application with certificate: {cert_name}")
 
-    app_path = DIST_DIR / f"{APP_NAME}.app"
-
     if not app_path.exists():
         print(f"ERROR: Application not found at {app_path}")
         return False
 
-    # Sign all frameworks and dylibs first
+    # Only release builds contact Apple's timestamp server (a round trip per codesign call)
+    timestamp_option = "--timestamp" if args.release else "--timestamp=none"
+
+    # Sign all frameworks and dylibs first: codesign takes many paths per call, so each CPU gets one batch
     frameworks_path = app_path / "Contents" / "Frameworks"
     if frameworks_path.exists():
         print("Signing frameworks...")
-        for framework in frameworks_path.rglob("*.framework"):
-            cmd = [
-                "codesign",
-                "--force",
-                "--deep",
-                "--sign", cert_name,
-                str(framework)
-            ]
-            run_command(cmd, f"Failed to sign {framework.name}")
-
-        for dylib in frameworks_path.rglob("*.dylib"):
-            cmd = [
-                "codesign",
-                "--force",
-                "--sign", cert_name,
-                str(dylib)
-            ]
-            run_command(cmd, f"Failed to sign {dylib.name}")
+        batch_count = os.cpu_count() or 1
+        frameworks, dylibs = find_signables(frameworks_path)
+        dylib_commands = [["codesign", "--force", timestamp_option, "--sign", cert_name] + batch
+                          for batch in split_into_batches(dylibs, batch_count)]
+        framework_commands = [["codesign", "--force", "--deep", timestamp_option, "--sign", cert_name] + batch
+                              for batch in split_into_batches(frameworks, batch_count)]
+
+        # dylibs go first, since re-signing a dylib inside an already signed framework would break its seal.
+        # A failed batch leaves every path in it unsigned, so don't go on to seal the bundle around them
+        if not run_commands_parallel(dylib_commands, "Failed to sign dylibs"):
+            return False
+        if not run_commands_parallel(framework_commands, "Failed to sign frameworks"):
+            return False
 
     # Sign the main app bundle
     cmd = [
@@ -299,6 +372,7 @@ def sign_application(cert_name):
         "--force",
         "--deep",
         "--verbose",
+        timestamp_option,
         "--sign", cert_name,
         "--options", "runtime",
         "--entitlements", "-",  # Use default entitlements
@@ -308,45 +382,79 @@ def sign_application(cert_name):
     return run_command(cmd, "Failed to sign application")
 
 
-def create_dmg():
-    """Create a DMG file for distribution"""
-    print("Creating DMG file...")
+def stage_dmg_image(app_path, sparse_path, mount_point):
+    """Create a sparse image sized for the app and copy the app into it (the image is always detached again)"""
+    app_size = sum(os.path.getsize(os.path.join(dir_path, file_name))
+                   for dir_path, _, file_names in os.walk(app_path)
+                   for file_name in file_names
+                   if not os.path.islink(os.path.join(dir_path, file_name)))
+    image_size_mb = app_size * 12 // 10 // (1024 * 1024) + 64                  # 20% headroom for filesystem overhead
+
+    if sparse_path.exists():
+        os.remove(sparse_path)
+    create_cmd = ["hdiutil", "create",
+                  "-size", f"{image_size_mb}m",
+                  "-fs", "HFS+",
+                  "-volname", APP_NAME,
+                  "-type", "SPARSE",
+                  str(sparse_path)]
+    if not run_command(create_cmd, "Failed to create DMG staging image"):
+        return False
 
-    # Find the app first
-    possible_app_locations = [
-        DIST_DIR / f"{APP_NAME}.app",
-        DIST_DIR / f"{APP_NAME.replace(' ', '')}.app",
-        DIST_DIR / APP_NAME.replace(" ", "") / f"{APP_NAME}.app",
-        DIST_DIR / APP_NAME.replace(" ", "") / f"{APP_NAME.replace(' ', '')}.app",
-    ]
+    os.makedirs(mount_point, exist_ok=True)
+    attach_cmd = ["hdiutil", "attach", str(sparse_path),
+                  "-mountpoint", str(mount_point),
+                  "-nobrowse", "-noverify", "-noautoopen"]
+    if not run_command(attach_cmd, "Failed to attach DMG staging image"):
+        return False
+    try:
+        # ditto keeps the bundle's symlinks, extended attributes and code signatures intact
+        return run_command(["ditto", str(app_path), str(mount_point / app_path.name)], "Failed to copy app into DMG")
+    finally:
+        run_command(["hdiutil", "detach", str(mount_point)], "Failed to detach DMG staging image")
 
-    app_path = None
-    for location in possible_app_locations:
-        if location.exists():
-            app_path = location
-            break
 
-    if not app_path:
-        print(f"ERROR: Application not found in any expected location")
-        return False
+def create_dmg(app_path):
+    """Create a DMG file for distribution"""
+    print("Creating DMG file...")
 
-    dmg_path = DIST_DIR / f"{APP_NAME.replace(' ', '-')}-{APP_VERSION}.dmg"
+    dmg_path    = DMG_PATH
+    sparse_path = BUILD_DIR / f"{APP_NAME}.sparseimage"
+    mount_point = BUILD_DIR / "dmg-mount"
 
     # Remove old DMG if it exists
     if dmg_path.exists():
         os.remove(dmg_path)
 
-    # Create a DMG
+    # The app is copied into a sparse image first, so compression is the only heavy step (done by hdiutil convert)
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    if not stage_dmg_image(app_path, sparse_path, mount_point):
+        return False
+
+    # Convert to the final DMG: dev builds skip compression (UDRO), release builds use lzfse (ULFO),
+    # which compresses much faster than the zlib used by UDZO
+    dmg_format = "ULFO" if args.release else "UDRO"
     cmd = [
-        "hdiutil", "create",
-        "-volname", APP_NAME,
-        "-srcfolder", str(app_path),
-        "-ov", "-format", "UDZO",
-        str(dmg_path)
+        "hdiutil", "convert", str(sparse_path),
+        "-ov", "-format", dmg_format,
+        "-o", str(dmg_path)
     ]
 
     success = run_command(cmd, "Failed to create DMG")
 
+    if not success and dmg_format == "ULFO":
+        # hdiutil without lzfse support: fall back to UDZO at the fastest zlib level
+        print("Retrying DMG creation with UDZO...")
+        cmd = [
+            "hdiutil", "convert", str(sparse_path),
+            "-ov", "-format", "UDZO",
+            "-imagekey", "zlib-level=1",
+            "-o", str(dmg_path)
+        ]
+        success = run_command(cmd, "Failed to create DMG")
+
+    os.remove(sparse_path)
+
     if success:
         print(f"✅ DMG created at: {dmg_path}")
 
@@ -356,6 +464,7 @@ def create_dmg():
             sign_cmd = [
                 "codesign",
                 "--force",
+                "--timestamp" if args.release else "--timestamp=none",
                 "--sign", args.cert_name,
                 str(dmg_path)
             ]
@@ -364,6 +473,37 @@ def create_dmg():
     return success
 
 
+def file_digest(path):
+    """blake2b digest of a file's contents"""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "blake2b").digest()
+
+
+def app_bundle_digest(app_path):
+    """Content hash of the app bundle (relative paths, symlink targets and file contents), files are hashed in parallel"""
+    files, links = [], []
+    for dir_path, _, file_names in os.walk(app_path):
+        for file_name in file_names:
+            path = os.path.join(dir_path, file_name)
+            (links if os.path.islink(path) else files).append(path)
+    files.sort()
+    links.sort()
+
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        file_digests = executor.map(file_digest, files)
+
+        digest = hashlib.blake2b()
+        for path, content_digest in zip(files, file_digests):
+            digest.update(os.path.relpath(path, app_path).encode())
+            digest.update(content_digest)
+    for path in links:
+        digest.update(os.path.relpath(path, app_path).encode())
+        digest.update(os.readlink(path).encode())
+    # the DMG also depends on how the app was signed and on the DMG format
+    digest.update(f"sign={args.sign} cert={args.cert_name} release={args.release}".encode())
+    return digest.hexdigest()
+
+
 def create_entitlements():
     """Create entitlements file for the app"""
     entitlements = """<?xml version="1.0" encoding="UTF-8"?>
@@ -402,39 +542,41 @@ def main():
     print(f"Project root: {PROJECT_ROOT}")
     print(f"OWASP directory: {OSBOT_DIR}")
     print(f"Build output: {DIST_DIR}")
+    print(f"Build log: {BUILD_LOG_FILE}")
 
-    # Prepare build environment
-    if not install_dependencies():
-        return
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    BUILD_LOG_FILE.write_text("")
+
+    # Prepare build environment: dependencies, entitlements and icon don't depend on each other, so they overlap
+    with ThreadPoolExecutor() as executor:
+        dependencies_future = executor.submit(install_dependencies)
+        entitlements_future = executor.submit(create_entitlements)
+        icon_future         = executor.submit(create_icon)
+        dependencies_ok     = dependencies_future.result()
+        entitlements_path   = entitlements_future.result()
+        icon_future.result()
 
-    # Create entitlements
-    entitlements_path = create_entitlements()
+    if not dependencies_ok:
+        return
 
     # Build the app
     if not build_app_with_pyinstaller():
         return
 
-    # Check where the app was actually built
-    possible_app_locations = [
-        DIST_DIR / f"{APP_NAME}.app",
-        DIST_DIR / f"{APP_NAME.replace(' ', '')}.app",
-        DIST_DIR / APP_NAME.replace(" ", "") / f"{APP_NAME}.app",
-        DIST_DIR / APP_NAME.replace(" ", "") / f"{APP_NAME.replace(' ', '')}.app",
-    ]
-
-    app_path = None
-    for location in possible_app_locations:
-        if location.exists():
-            app_path = location
-            print(f"Found app at: {app_path}")
-            break
-
+    # Check where the app was actually built (looked up once, then passed to the signing and DMG steps)
+    app_path = find_app_bundle()
     if not app_path:
         print("ERROR: Could not find built application.")
         print("Searched in:")
-        for loc in possible_app_locations:
+        for loc in POSSIBLE_APP_LOCATIONS:
             print(f"  - {loc}")
         return
+    print(f"Found app at: {app_path}")
+
+    # Hashed before signing: the signature embeds a timestamp, so a signed bundle is never byte-identical
+    app_digest = app_bundle_digest(app_path)
+    dmg_up_to_date = (DMG_PATH.exists() and APP_DIGEST_FILE.exists() and
+                      APP_DIGEST_FILE.read_text().strip() == app_digest)
 
     # Sign the app if requested
     if args.sign:
@@ -443,12 +585,16 @@ def main():
             print("ERROR: Certificate name must be provided with --cert-name when using --sign")
             return
 
-        if not sign_application(cert_name):
+        if not sign_application(cert_name, app_path):
             return
 
-    # Create DMG for distribution
-    if not create_dmg():
-        return
+    # Create DMG for distribution (skipped when the app is unchanged since the DMG was made)
+    if dmg_up_to_date:
+        print(f"App unchanged since the last build, reusing DMG: {DMG_PATH}")
+    else:
+        if not create_dmg(app_path):
+            return
+        APP_DIGEST_FILE.write_text(app_digest)
 
     # Clean up
     if entitlements_path.exists():
@@ -456,8 +602,7 @@ def main():
 
     print(f"\n✅ Build completed successfully!")
     print(f"Application bundle: {app_path}")
-    dmg_name = f"{APP_NAME.replace(' ', '-')}-{APP_VERSION}.dmg"
-    print(f"DMG installer: {DIST_DIR / dmg_name}")
+    print(f"DMG installer: {DMG_PATH}")
     print("\nTo run the app directly:")
     print(f"  open '{app_path}'")
 
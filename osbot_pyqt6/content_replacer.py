@@ -4,24 +4,305 @@ Content replacement functionality for mitmproxy
 Supports regex-based HTML text replacement with JSON configuration
 """
 
+import os
 import re
 import json
+import time
+import shutil
+import tempfile
+import logging
+import functools
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, NamedTuple, Optional
 from datetime import datetime
 
+try:                                                        # optional faster JSON serializer for save_config
+    import orjson
+except ImportError:
+    orjson = None
+
+try:                                                        # optional linear-time engine, immune to catastrophic backtracking
+    import re2
+except ImportError:
+    re2 = None
+
+try:                                                        # optional Aho-Corasick automaton for fused literal rules
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+logger = logging.getLogger(__name__)
+
+PROCESSABLE_TYPES    = frozenset({"text/html", "text/plain", "text/css", "text/javascript", "text/xml",       # text-based types that are safe to modify
+                                  "application/javascript", "application/json", "application/xml"})
+BODY_TAG_PATTERN     = r"(<body[^>]*>)"                    # the default banner rule, applied with find instead of the regex engine
+REGEX_METACHARACTERS = frozenset(".^$*+?{}[]|()")
+ESCAPE_LENGTHS       = {"x": 2, "u": 4, "U": 8}             # hex digits following these escapes
+REGEX_QUANTIFIERS    = frozenset("*+?{")
+INLINE_FLAGS         = re.compile(r"\(\?[aiLmsux-]")
+REGEX_REPEAT         = re.compile(r"\{\d*(?:,\d*)?\}")
+RE2_INLINE_FLAGS     = {re.IGNORECASE: "i", re.MULTILINE: "m", re.DOTALL: "s"}
+SCOPED_FLAGS         = {re.IGNORECASE: "i", re.MULTILINE: "m", re.DOTALL: "s", re.VERBOSE: "x", re.ASCII: "a"}
+NUMBERED_BACKREF     = re.compile(r"\\[1-9]")
+
+
+@functools.lru_cache(maxsize=512)                           # unchanged rules are not recompiled on reload_config / add_replacement
+def compile_pattern(pattern: str, flags: int = 0):
+    """Compile (str or bytes) with re2 when it is installed and supports the pattern, falling back to re (backrefs, lookaround, VERBOSE ...)"""
+    if re2 is not None and not flags & ~(re.IGNORECASE | re.MULTILINE | re.DOTALL):
+        inline = "".join(letter for flag, letter in RE2_INLINE_FLAGS.items() if flags & flag)
+        prefix = f"(?{inline})" if inline else ""
+        try:
+            return re2.compile(prefix.encode() + pattern if isinstance(pattern, bytes) else prefix + pattern)
+        except re2.error as e:
+            logger.warning("⚠️  re2 can't compile '%s' (%s), using re instead", pattern, e)
+    return re.compile(pattern, flags)
+
+
+def mime_type(content_type: str) -> str:
+    """'Text/HTML; charset=utf-8' -> 'text/html'"""
+    return content_type.split(";", 1)[0].strip().lower()
+
+
+def literal_text(pattern: str):
+    """Return the plain text a pattern matches if it has no regex features (escaped punctuation allowed), else None"""
+    chars   = []
+    escaped = False
+    for char in pattern:
+        if escaped:
+            if char.isascii() and char.isalnum():           # \b, \d, \1 ... are regex features, not literals
+                return None
+            chars.append(char)
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char in REGEX_METACHARACTERS:
+            return None
+        else:
+            chars.append(char)
+    if escaped:
+        return None
+    return "".join(chars)
+
+
+def escape_length(pattern: str, index: int, escaped: str) -> int:
+    r"""How many characters from pattern[index], right after '\' + escaped, still belong to that escape: \xhh, \uhhhh,
+       \Uhhhhhhhh, \N{name}, and octal escapes or group references (up to 3 digits in all)"""
+    if escaped in ESCAPE_LENGTHS:
+        return ESCAPE_LENGTHS[escaped]
+    if escaped == "N" and pattern[index:index + 1] == "{":
+        end = pattern.find("}", index)
+        return len(pattern) - index if end == -1 else end + 1 - index
+    if escaped.isdigit():
+        length = 0
+        while length < 2 and pattern[index + length:index + length + 1].isdigit():
+            length += 1
+        return length
+    return 0
+
+
+def required_literal(pattern: str, flags: int = 0):
+    """
+    Return the longest ASCII text that every match of the pattern must contain, or None when there isn't one.
+    Only top-level text counts (groups, classes, alternations and quantified characters may not be in a match),
+    so the result is cheap to look for in the raw body bytes before decoding or running the regex.
+    """
+    if flags & (re.IGNORECASE | re.VERBOSE) or INLINE_FLAGS.search(pattern):
+        return None
+    runs  = [[]]
+    depth = 0
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == "\\":
+            escaped = pattern[index + 1:index + 2]
+            if depth == 0 and escaped and escaped.isascii() and not escaped.isalnum():
+                runs[-1].append(escaped)
+                index += 2
+                continue
+            runs.append([])
+            index += 2 + escape_length(pattern, index + 2, escaped)
+            continue
+        if char == "[":                                     # skip the whole character class
+            end = index + 1
+            if pattern[end:end + 1] == "^":
+                end += 1
+            if pattern[end:end + 1] == "]":
+                end += 1
+            while end < len(pattern) and pattern[end] != "]":
+                end += 2 if pattern[end] == "\\" else 1
+            runs.append([])
+            index = end + 1
+            continue
+        if char == "|" and depth == 0:
+            return None
+        if char == "(":
+            depth += 1
+            runs.append([])
+        elif char == ")":
+            depth -= 1
+            runs.append([])
+        elif char in REGEX_QUANTIFIERS:
+            if char != "+" and runs[-1]:                    # the quantified character may be absent
+                runs[-1].pop()
+            runs.append([])
+            if char == "{":
+                repeat = REGEX_REPEAT.match(pattern, index)
+                if repeat:
+                    index = repeat.end()
+                    continue
+        elif depth == 0 and char.isascii() and char not in REGEX_METACHARACTERS:
+            runs[-1].append(char)
+        else:
+            runs.append([])
+        index += 1
+    literal = max(("".join(run) for run in runs), key=len)
+    return literal or None
+
+
+def literals_overlap(first: str, second: str) -> bool:
+    """True if the two strings can share characters in a text (one contains the other, or one ends with the start of the other)"""
+    if not first or not second:
+        return False
+    if first in second or second in first:
+        return True
+    return any(first.endswith(second[:size]) or second.endswith(first[:size])
+               for size in range(1, min(len(first), len(second))))
+
+
+def literal_replacer(mapping: Dict):
+    """Build a function replacing every key of mapping with its value in a single pass, returning (text, count) like re.subn"""
+    if ahocorasick is not None and all(isinstance(literal, str) for literal in mapping):
+        automaton = ahocorasick.Automaton()
+        for literal, replacement in mapping.items():
+            automaton.add_word(literal, (len(literal), replacement))
+        automaton.make_automaton()
+
+        def replace(text: str) -> tuple:
+            chunks   = []
+            position = 0
+            for end, (size, replacement) in automaton.iter_long(text):
+                chunks.append(text[position:end - size + 1])
+                chunks.append(replacement)
+                position = end + 1
+            if not chunks:
+                return text, 0
+            chunks.append(text[position:])
+            return "".join(chunks), len(chunks) // 2
+        return replace
+
+    literals  = sorted(mapping, key=len, reverse=True)
+    separator = b"|" if isinstance(literals[0], bytes) else "|"
+    regex     = re.compile(separator.join(re.escape(literal) for literal in literals))
+    return functools.partial(regex.subn, lambda match: mapping[match.group()])
+
+
+def literal_stream(mapping: Dict[bytes, bytes], matches: List[int]):
+    """
+    Return a feed(chunk) function applying a literal mapping to a body pushed through it chunk by chunk, feed(None)
+    ends it and returns what was held back. Between chunks only the last (longest literal - 1) bytes are held back:
+    a match starting before that point is already decided, so no match is ever split or changed.
+    The number of replacements is added to matches[0].
+    """
+    literals = sorted(mapping, key=len, reverse=True)
+    regex    = re.compile(b"|".join(re.escape(literal) for literal in literals))
+    window   = len(literals[0])
+    tail     = b""
+
+    def feed(chunk):
+        nonlocal tail
+        buffer   = tail + chunk if chunk is not None else tail
+        final    = len(buffer) - window + 1 if chunk is not None else len(buffer)
+        output   = []
+        position = 0
+        for match in regex.finditer(buffer):
+            if match.start() >= final:
+                break
+            output.append(buffer[position:match.start()])
+            output.append(mapping[match.group()])
+            position    = match.end()
+            matches[0] += 1
+        boundary = max(position, final)
+        output.append(buffer[position:boundary])
+        tail = buffer[boundary:]
+        return b"".join(output)
+
+    return feed
+
+
+def inject_after_body(text, banner, case_insensitive: bool = True):
+    """
+    Same result as re.subn(r"(<body[^>]*>)", r"\1" + banner, text) on str or bytes, using find: no per-character
+    regex work, and a '<body' without a closing '>' ends the scan instead of being walked to the end of the document
+    for every later '<body'. Returns (text, count), or None when lowercasing a str changes its length (use the regex).
+    """
+    tag, close = ("<body", ">") if isinstance(text, str) else (b"<body", b">")
+    haystack   = text.lower() if case_insensitive else text
+    if len(haystack) != len(text):
+        return None
+    chunks   = []
+    position = 0
+    start    = haystack.find(tag)
+    while start != -1:
+        end = text.find(close, start + len(tag))
+        if end == -1:                                       # no '>' left, so no later '<body' can match either
+            break
+        end += 1
+        chunks.append(text[position:end])
+        chunks.append(banner)
+        position = end
+        start    = haystack.find(tag, end)
+    if not chunks:
+        return text, 0
+    chunks.append(text[position:])
+    return text[:0].join(chunks), len(chunks) // 2
+
+
+def replace_ignorecase(text, needle, replacement):
+    """
+    Case-insensitive literal replace for ASCII text (str or bytes): find the lowercase needle in one lowered copy
+    and splice the replacement into the original at those positions. Returns (text, count) like re.subn.
+    """
+    lowered = text.lower()
+    start   = lowered.find(needle)
+    if start == -1:
+        return text, 0
+    chunks   = []
+    position = 0
+    while start != -1:
+        chunks.append(text[position:start])
+        chunks.append(replacement)
+        position = start + len(needle)
+        start    = lowered.find(needle, position)
+    chunks.append(text[position:])
+    return text[:0].join(chunks), len(chunks) // 2
+
+
+class RuleSet(NamedTuple):
+    """The enabled rules for one MIME type, with everything process_content needs worked out when the config changes"""
+    rules        : List[Dict]
+    prefilters   : Optional[tuple]                          # every rule's required literal, None if a rule has none
+    literal_only : bool
+    plan         : List[tuple]
+    binary_plan  : Optional[List[tuple]]                    # None unless every rule can run on bytes
+
 
 class ContentReplacer:
     """
     Handles content replacement based on regex patterns stored in JSON configuration
     """
 
-    def __init__(self, config_file=None, data_dir="./data"):
+    def __init__(self, config_file=None, data_dir="./data", single_pass=False):
         self.data_dir = Path(data_dir)
+        self.single_pass = single_pass
         self.data_dir.mkdir(exist_ok=True)
 
         self.config_file = self.data_dir / (config_file or "replacements.json")
         self.replacements = []
+        self.last_replaced = None                           # time.time() of the last modification, formatted only when read
+        self.plans = {}
+        self.rule_sets = {}
+        self.any_rule_set = None
         self.stats = {
             "total_processed": 0,
             "total_replaced": 0,
@@ -29,11 +310,12 @@ class ContentReplacer:
         }
 
         # Load or create configuration
+        self.index_replacements()
         self.load_config()
 
-        print(f"🔄 Content Replacer initialized")
-        print(f"   Config file: {self.config_file}")
-        print(f"   Active replacements: {len(self.replacements)}")
+        logger.info("🔄 Content Replacer initialized")
+        logger.info("   Config file: %s", self.config_file)
+        logger.info("   Active replacements: %d", len(self.replacements))
 
     def load_config(self):
         """Load replacement configuration from JSON file"""
@@ -44,14 +326,15 @@ class ContentReplacer:
 
                 self.replacements = config.get("replacements", [])
                 self.stats = config.get("stats", self.stats)
+                self.compile_replacements()
 
-                print(f"✅ Loaded {len(self.replacements)} replacement rules")
+                logger.info("✅ Loaded %d replacement rules", len(self.replacements))
             else:
                 # Create default configuration
                 self.create_default_config()
 
         except Exception as e:
-            print(f"❌ Error loading config: {e}")
+            logger.error("❌ Error loading config: %s", e)
             self.create_default_config()
 
     def create_default_config(self):
@@ -94,18 +377,281 @@ class ContentReplacer:
         }
 
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(default_config, f, indent=2, ensure_ascii=False)
+            self.write_config(default_config)
 
             self.replacements = default_config["replacements"]
-            print(f"✅ Created default config: {self.config_file}")
+            self.compile_replacements()
+            logger.info("✅ Created default config: %s", self.config_file)
 
         except Exception as e:
-            print(f"❌ Error creating default config: {e}")
+            logger.error("❌ Error creating default config: %s", e)
+
+    def compile_replacements(self):
+        """Compile every rule's pattern once, so process_content never has to"""
+        for replacement in self.replacements:
+            self.compile_replacement(replacement)
+        self.index_replacements()
+
+    def validate_template(self, pattern: str, flags: int, template: str):
+        """
+        Raise re.error now for a replacement template that would fail at sub time (bad escape, unknown group):
+        the pattern plus an empty alternative always matches '', and expanding that match checks every reference.
+        """
+        try:
+            always_matches = re.compile(f"(?:{pattern}\n)|", flags)
+        except re.error:                                    # e.g. global inline flags, which must stay at the start
+            return
+        try:
+            always_matches.match("").expand(template)
+        except IndexError as e:                             # unknown group name
+            raise re.error(str(e)) from None
+
+    def index_replacements(self):
+        """Group the enabled rules by MIME type (keeping their order) into RuleSets, so each request needs a single dict lookup"""
+        enabled           = [replacement for replacement in self.replacements
+                             if replacement.get("enabled", True) and replacement.get("_compiled") is not None]
+        mimes             = set().union(*(replacement["_types"] for replacement in enabled))
+        self.plans        = {}
+        self.any_rule_set = self.rule_set([replacement for replacement in enabled if not replacement["_types"]])
+        self.rule_sets    = {mime: self.rule_set([replacement for replacement in enabled
+                                                  if not replacement["_types"] or mime in replacement["_types"]])
+                             for mime in mimes}
+
+    def rule_set(self, rules: List[Dict]) -> RuleSet:
+        """Precompute the prefilters, bytes eligibility and replacement plans for a list of rules"""
+        prefilters = tuple(replacement["_prefilter"] for replacement in rules)
+        binary     = all(replacement["_binary"] for replacement in rules)
+        return RuleSet(rules        = rules,
+                       prefilters   = None if None in prefilters else prefilters,
+                       literal_only = all(replacement["_literal"] for replacement in rules),
+                       plan         = self.replacement_plan(rules),
+                       binary_plan  = self.replacement_plan(rules, binary=True) if binary else None)
+
+    def compile_replacement(self, replacement: Dict) -> bool:
+        """Attach the compiled regex to a rule, disabling the rule if the pattern is invalid"""
+        try:
+            replacement["_types"] = frozenset(mime_type(content_type) for content_type in replacement.get("content_types", []))
+            flags = self.parse_regex_flags(replacement.get("flags", []))
+            replacement["_flags"]    = flags
+            replacement["_compiled"] = compile_pattern(replacement["pattern"], flags)
+            self.validate_template(replacement["pattern"], flags, replacement["replacement"])
+            replacement["_literal"]  = None
+            replacement["_binary"]   = None
+            replacement["_prefilter"] = None
+            replacement["_inject"]   = None
+            replacement["_literal_ci"] = None
+            banner = replacement["replacement"][2:]
+            if (replacement["pattern"] == BODY_TAG_PATTERN and replacement["replacement"].startswith("\\1") and
+                    "\\" not in banner and not banner[:1].isdigit() and not flags & ~(re.IGNORECASE | re.MULTILINE | re.DOTALL)):
+                replacement["_inject"] = banner
+            if not flags & (re.IGNORECASE | re.VERBOSE) and "\\" not in replacement["replacement"]:
+                replacement["_literal"] = literal_text(replacement["pattern"])
+            elif flags & re.IGNORECASE and not flags & ~(re.IGNORECASE | re.MULTILINE | re.DOTALL) and "\\" not in replacement["replacement"]:
+                literal = literal_text(replacement["pattern"])
+                if literal and literal.isascii():                                              # see replace_ignorecase
+                    replacement["_literal_ci"] = literal.lower()
+            if replacement["pattern"].isascii() and replacement["replacement"].isascii():          # can run on the raw body bytes
+                replacement["_binary"] = compile_pattern(replacement["pattern"].encode(), flags)
+            prefilter = required_literal(replacement["pattern"], flags)
+            if prefilter:
+                replacement["_prefilter"] = prefilter.encode()
+            return True
+        except (re.error, ValueError, KeyError, TypeError) as e:    # e.g. LOCALE on a str pattern, or no "replacement"
+            logger.error("❌ Invalid pattern in replacement '%s': %s", replacement.get('name', 'unknown'), e)
+            replacement.setdefault("_types", frozenset())
+            replacement["_error"]    = str(e)
+            replacement["_compiled"] = None
+            replacement["_literal"]  = None
+            replacement["_binary"]   = None
+            replacement["_prefilter"] = None
+            replacement["_inject"]   = None
+            replacement["_literal_ci"] = None             # the user's enabled flag is kept, index_replacements skips the rule
+            return False
+
+    def may_match(self, rule_set: RuleSet, content: bytes) -> bool:
+        """
+        Cheap check on the raw bytes: if no rule's required literal is in the body, the first rule can't match,
+        so (rules being applied in order) none of them can. A rule without a prefilter makes every body a maybe.
+        """
+        prefilters = rule_set.prefilters
+        if prefilters is None:
+            return True
+        for prefilter in prefilters:
+            if prefilter in content:
+                return True
+        return False
+
+    def use_binary(self, rule_set: RuleSet, content: bytes) -> bool:
+        """
+        Rules whose pattern and replacement are ASCII can run on the raw bytes, skipping the decode/encode round-trip.
+        Literals match the same way in any ASCII-compatible encoding; regexes ('.', '\\w', IGNORECASE ...) only
+        behave the same on bytes when the body itself is ASCII.
+        """
+        return rule_set.binary_plan is not None and (rule_set.literal_only or content.isascii())
+
+    def replacement_plan(self, replacements: List[Dict], binary: bool = False) -> List[tuple]:
+        """
+        Turn the applicable rules into (name, apply) steps, cached per rule set. apply returns (text, count) like
+        re.subn and works on str (or on bytes when binary).
+        Consecutive literal rules that can't interact (no pattern overlaps another rule's pattern or
+        replacement) give the same result applied together, so they are fused into one pass:
+        str.translate for single characters and literal_replacer for longer strings.
+        """
+        key  = (binary, *map(id, replacements))
+        plan = self.plans.get(key)
+        if plan is None and self.single_pass and len(replacements) > 1:
+            step = self.single_pass_step(replacements, binary)
+            if step:
+                plan = self.plans[key] = [step]
+        if plan is None:
+            plan = []
+            for group in self.rule_groups(replacements):
+                if isinstance(group, list):
+                    plan.extend(self.fused_steps(group, binary))
+                else:
+                    plan.append(self.replacement_step(group, binary))
+            self.plans[key] = plan
+        return plan
+
+    def rule_groups(self, replacements: List[Dict]) -> List:
+        """Split the rules, in order, into runs of literal rules that can be fused (lists) and single regex rules (dicts)"""
+        groups = []
+        run    = []
+        for replacement in replacements:
+            literal = replacement["_literal"]
+            if literal and all(self.can_fuse(replacement, other) for other in run):
+                run.append(replacement)
+                continue
+            if run:
+                groups.append(run)
+            run = [replacement] if literal else []
+            if not literal:
+                groups.append(replacement)
+        if run:
+            groups.append(run)
+        return groups
+
+    def single_pass_step(self, replacements: List[Dict], binary: bool = False):
+        """
+        Opt-in (single_pass=True): one alternation (?P<r0>pattern0)|(?P<r1>pattern1)|... over the body for all rules,
+        each rule keeping its flags in a scoped (?flags:...) group. This changes the semantics: rules apply
+        simultaneously, so the leftmost match wins (the earlier rule on a tie) and no rule sees another's output.
+        Returns None (per-rule plan) for LOCALE rules, numbered backreferences inside patterns, or group name clashes.
+        """
+        alternatives = []
+        replacers    = {}
+        group        = 1
+        for index, replacement in enumerate(replacements):
+            flags   = replacement["_flags"]
+            pattern = replacement["pattern"]
+            if flags & re.LOCALE or NUMBERED_BACKREF.search(pattern):
+                return None
+            scoped = "".join(letter for flag, letter in SCOPED_FLAGS.items() if flags & flag)
+            alternatives.append(f"(?P<r{index}>(?{scoped}:{pattern}))" if scoped else f"(?P<r{index}>{pattern})")
+            replace_with = replacement["replacement"].encode() if binary else replacement["replacement"]
+            if "\\" in replacement["replacement"]:                                          # template: expand with the rule's own groups
+                regex = replacement["_binary"] if binary else replacement["_compiled"]
+                replacers[group] = functools.partial(self.expand_match, regex, replace_with)
+            else:
+                replacers[group] = replace_with
+            group += 1 + replacement["_compiled"].groups
+        try:
+            fused = "|".join(alternatives)
+            fused = compile_pattern(fused.encode() if binary else fused)
+        except re.error as e:
+            logger.warning("⚠️  Can't fuse replacement rules into a single pass (%s), applying them one by one", e)
+            return None
+
+        def replace(match):
+            replacer = replacers[match.lastindex]
+            return replacer if isinstance(replacer, (str, bytes)) else replacer(match)
+        return self.group_name(replacements), functools.partial(fused.subn, replace)
+
+    def expand_match(self, regex, template, match):
+        """Re-match a fused match with the rule's own regex so its replacement template sees the rule's groups"""
+        own_match = regex.match(match.string, match.start(), match.end())
+        return own_match.expand(template) if own_match else match.group()
+
+    def can_fuse(self, replacement: Dict, other: Dict) -> bool:
+        """Check that two literal rules give the same result whichever order (or at once) they are applied"""
+        if not replacement["replacement"] or not other["replacement"]:              # a deletion can join text into a new match
+            return False
+        return not (literals_overlap(replacement["_literal"], other["_literal"      ]) or
+                    literals_overlap(replacement["_literal"], other["replacement"   ]) or
+                    literals_overlap(other["_literal"      ], replacement["replacement"]))
+
+    def fused_steps(self, run: List[Dict], binary: bool = False) -> List[tuple]:
+        """Fuse a run of independent literal rules into at most one translate and one literal_replacer step"""
+        single_chars = [replacement for replacement in run if len(replacement["_literal"]) == 1 and
+                        (not binary or len(replacement["replacement"]) == 1)]              # bytes.translate maps one byte to one byte
+        longer       = [replacement for replacement in run if replacement not in single_chars]
+        steps        = []
+        if len(single_chars) > 1:
+            mapping = self.literal_mapping(single_chars, binary)
+            table   = bytes.maketrans(b"".join(mapping), b"".join(mapping.values())) if binary else str.maketrans(mapping)
+            def translate(text):
+                translated = text.translate(table)
+                return translated, int(translated != text)              # translate doesn't count, any change counts as one
+            steps.append((self.group_name(single_chars), translate))
+        else:
+            steps.extend(self.replacement_step(replacement, binary) for replacement in single_chars)
+        if len(longer) > 1:
+            steps.append((self.group_name(longer), literal_replacer(self.literal_mapping(longer, binary))))
+        else:
+            steps.extend(self.replacement_step(replacement, binary) for replacement in longer)
+        return steps
+
+    def literal_mapping(self, replacements: List[Dict], binary: bool = False) -> Dict:
+        if binary:
+            return {replacement["_literal"].encode(): replacement["replacement"].encode() for replacement in replacements}
+        return {replacement["_literal"]: replacement["replacement"] for replacement in replacements}
+
+    def group_name(self, replacements: List[Dict]) -> str:
+        return ", ".join(replacement["name"] for replacement in replacements)
+
+    def replacement_step(self, replacement: Dict, binary: bool = False) -> tuple:
+        """A single rule as a (name, apply) step: str.replace for literal patterns, find for the <body> banner, the regex's subn otherwise"""
+        literal      = replacement["_literal"]
+        replace_with = replacement["replacement"]
+        regex        = replacement["_compiled"]
+        if binary:
+            literal      = literal and literal.encode()
+            replace_with = replace_with.encode()
+            regex        = replacement["_binary"]
+        if literal:
+            def replace_literal(text):
+                count = text.count(literal)
+                return (text.replace(literal, replace_with), count) if count else (text, 0)
+            return replacement["name"], replace_literal
+        subn      = functools.partial(regex.subn, replace_with)
+        banner    = replacement["_inject"]
+        if banner is not None:
+            banner           = banner.encode() if binary else banner
+            case_insensitive = bool(replacement["_flags"] & re.IGNORECASE)
+
+            def inject_banner(text):
+                return inject_after_body(text, banner, case_insensitive) or subn(text)
+            return replacement["name"], inject_banner
+        needle = replacement["_literal_ci"]
+        if needle is not None:
+            needle = needle.encode() if binary else needle
+
+            def replace_literal_ci(text):                   # on ASCII text lower() gives exactly the IGNORECASE matches
+                return replace_ignorecase(text, needle, replace_with) if text.isascii() else subn(text)
+            return replacement["name"], replace_literal_ci
+        prefilter = replacement["_prefilter"]
+        if prefilter is None:
+            return replacement["name"], subn
+        if not binary:
+            prefilter = prefilter.decode()
+
+        def replace_regex(text):                            # skip the regex scan when its required literal isn't in the current text
+            return subn(text) if prefilter in text else (text, 0)
+        return replacement["name"], replace_regex
 
     def reload_config(self):
         """Reload configuration from file"""
-        print("🔄 Reloading replacement configuration...")
+        logger.info("🔄 Reloading replacement configuration...")
         self.load_config()
 
     def should_process_content(self, content_type: str, url: str = None) -> bool:
@@ -113,19 +659,7 @@ class ContentReplacer:
         if not content_type:
             return False
 
-        # Common text-based content types that are safe to modify
-        processable_types = [
-            "text/html",
-            "text/plain",
-            "text/css",
-            "application/javascript",
-            "application/json",
-            "text/javascript",
-            "application/xml",
-            "text/xml"
-        ]
-
-        return any(ptype in content_type.lower() for ptype in processable_types)
+        return mime_type(content_type) in PROCESSABLE_TYPES
 
     def process_content(self, content: bytes, content_type: str, url: str = None) -> bytes:
         """
@@ -135,80 +669,96 @@ class ContentReplacer:
         try:
             self.stats["total_processed"] += 1
 
-            if not self.should_process_content(content_type, url):
+            if not content_type:
+                return content
+
+            mime = mime_type(content_type)
+            if mime not in PROCESSABLE_TYPES:
                 return content
 
-            # Get enabled replacements for this content type
-            applicable_replacements = self.get_applicable_replacements(content_type)
+            # Get enabled replacements for this content type (all per-rule work was done by index_replacements)
+            rule_set = self.rule_sets.get(mime, self.any_rule_set)
 
-            if not applicable_replacements:
+            if not rule_set.rules or not self.may_match(rule_set, content):
                 return content
 
-            # Decode content to string
-            try:
-                text_content = content.decode('utf-8')
-            except UnicodeDecodeError:
+            # ASCII-only rules run on the raw bytes, everything else on the decoded string
+            binary = self.use_binary(rule_set, content)
+            if binary:
+                text_content = content
+            else:
                 try:
-                    text_content = content.decode('latin-1')
+                    text_content = content.decode('utf-8')
                 except UnicodeDecodeError:
-                    # Can't decode, return original
-                    return content
+                    try:
+                        text_content = content.decode('latin-1')
+                    except UnicodeDecodeError:
+                        # Can't decode, return original
+                        return content
 
-            original_content = text_content
             modified = False
+            debug    = logger.isEnabledFor(logging.DEBUG)
 
-            # Apply each replacement
-            for replacement in applicable_replacements:
+            # Apply each replacement (independent literal rules are fused into a single pass). Rebinding text_content
+            # frees the previous body straight away, and a rule that doesn't match hands back the same object
+            for name, apply in rule_set.binary_plan if binary else rule_set.plan:
                 try:
-                    pattern = replacement["pattern"]
-                    replace_with = replacement["replacement"]
-                    flags = self.parse_regex_flags(replacement.get("flags", []))
-
-                    # Compile regex with flags
-                    regex = re.compile(pattern, flags)
-
-                    # Apply replacement
-                    new_content = regex.sub(replace_with, text_content)
-
-                    if new_content != text_content:
-                        print(f"🔄 Applied replacement '{replacement['name']}' to {url}")
-                        text_content = new_content
-                        modified = True
+                    text_content, count = apply(text_content)
+                except Exception as e:                      # a failing rule is skipped, the others still apply
+                    logger.error("❌ Error applying replacement '%s': %s", name, e)
+                    continue
 
-                except Exception as e:
-                    print(f"❌ Error applying replacement '{replacement.get('name', 'unknown')}': {e}")
+                if count:
+                    if debug:
+                        logger.debug("🔄 Applied replacement '%s' to %s (%d matches)", name, url, count)
+                    modified = True
 
             if modified:
                 self.stats["total_replaced"] += 1
-                self.stats["last_updated"] = datetime.now().isoformat()
+                self.last_replaced = time.time()
 
                 # Encode back to bytes
-                return text_content.encode('utf-8')
+                return text_content if binary else text_content.encode('utf-8')
 
             return content
 
         except Exception as e:
-            print(f"❌ Error processing content: {e}")
+            logger.error("❌ Error processing content: %s", e)
             return content
 
-    def get_applicable_replacements(self, content_type: str) -> List[Dict]:
-        """Get replacements that apply to the given content type"""
-        applicable = []
-
-        for replacement in self.replacements:
-            # Skip disabled replacements
-            if not replacement.get("enabled", True):
-                continue
-
-            # Check content type filter
-            allowed_types = replacement.get("content_types", [])
-            if allowed_types:
-                if not any(ctype in content_type.lower() for ctype in allowed_types):
-                    continue
+    def stream_processor(self, content_type: str, matches: List[int], url: str = None):
+        """
+        Return a process(chunk) function rewriting a body as it is forwarded chunk by chunk (process(b"") ends it and
+        returns the bytes still held back), adding the number of replacements to matches[0]. Only bodies whose
+        applicable rules are all ASCII literals can be rewritten without the whole body, otherwise (or when no rule
+        applies) returns None.
+        """
+        mime       = mime_type(content_type) if content_type else None
+        applicable = self.get_applicable_replacements(mime) if mime in PROCESSABLE_TYPES else []
+        if not applicable or not all(replacement["_literal"] and replacement["_binary"] for replacement in applicable):
+            return None
+
+        self.stats["total_processed"] += 1
+        stages = [literal_stream(self.literal_mapping(group, binary=True), matches) for group in self.rule_groups(applicable)]
+
+        def process(chunk):
+            if chunk:
+                for stage in stages:
+                    chunk = stage(chunk)
+                return chunk
+            for stage in stages:                            # end of the body: flush each stage into the next one
+                chunk = stage(chunk) + stage(None)
+            if matches[0]:
+                logger.debug("🔄 Applied %d streamed replacements to %s", matches[0], url)
+                self.stats["total_replaced"] += 1
+                self.last_replaced = time.time()
+            return chunk
 
-            applicable.append(replacement)
+        return process
 
-        return applicable
+    def get_applicable_replacements(self, content_type: str) -> List[Dict]:
+        """Get the enabled replacements that apply to the given content type (rules without content_types apply to all)"""
+        return self.rule_sets.get(mime_type(content_type), self.any_rule_set).rules
 
     def parse_regex_flags(self, flag_names: List[str]) -> int:
         """Convert flag names to regex flags"""
@@ -243,9 +793,11 @@ class ContentReplacer:
             "created": datetime.now().isoformat()
         }
 
+        self.compile_replacement(new_replacement)
         self.replacements.append(new_replacement)
+        self.index_replacements()
         self.save_config()
-        print(f"✅ Added replacement rule: {name}")
+        logger.info("✅ Added replacement rule: %s", name)
 
     def save_config(self):
         """Save current configuration to file"""
@@ -255,22 +807,53 @@ class ContentReplacer:
                     "description": "Content replacement configuration for mitmproxy",
                     "last_updated": datetime.now().isoformat()
                 },
-                "replacements": self.replacements,
-                "stats": self.stats
+                "replacements": [self.serializable_replacement(r) for r in self.replacements],
+                "stats": self.current_stats()
             }
 
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
+            self.write_config(config)
 
-            print(f"✅ Configuration saved to {self.config_file}")
+            logger.info("✅ Configuration saved to %s", self.config_file)
 
         except Exception as e:
-            print(f"❌ Error saving config: {e}")
+            logger.error("❌ Error saving config: %s", e)
+
+    def write_config(self, config: Dict):
+        """Write the config to a temp file next to it, then move it into place (a crash never leaves a partial file)"""
+        if orjson:
+            data = orjson.dumps(config, option=orjson.OPT_INDENT_2)
+        else:
+            data = json.dumps(config, indent=2, ensure_ascii=False).encode('utf-8')
+        with tempfile.NamedTemporaryFile(dir=self.config_file.parent, prefix=".replacements-", suffix=".tmp", delete=False) as f:
+            f.write(data)
+        try:
+            # NamedTemporaryFile creates the file 0600: give it the config's current mode (or the usual default)
+            if self.config_file.exists():
+                shutil.copymode(self.config_file, f.name)
+            else:
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(f.name, 0o644 & ~umask)
+            os.replace(f.name, self.config_file)
+        except OSError:
+            os.unlink(f.name)
+            raise
+
+    def serializable_replacement(self, replacement: Dict) -> Dict:
+        """Strip the runtime-only keys (prefixed with '_') before writing a rule to JSON"""
+        return {key: value for key, value in replacement.items() if not key.startswith("_")}
+
+    def current_stats(self) -> Dict[str, Any]:
+        """The stats with last_updated formatted from the last modification time (kept as a float on the hot path)"""
+        if self.last_replaced is not None:
+            self.stats["last_updated"] = datetime.fromtimestamp(self.last_replaced).isoformat()
+            self.last_replaced = None
+        return self.stats
 
     def get_stats(self) -> Dict[str, Any]:
         """Get replacement statistics"""
         return {
-            **self.stats,
+            **self.current_stats(),
             "active_replacements": len([r for r in self.replacements if r.get("enabled", True)]),
             "total_replacements": len(self.replacements)
         }
@@ -283,18 +866,23 @@ class ContentReplacer:
         """Enable or disable a replacement by name"""
         for replacement in self.replacements:
             if replacement["name"] == name:
+                if enabled and replacement.get("_compiled") is None:
+                    logger.warning("❌ Can't enable replacement '%s', its pattern is invalid: %s", name, replacement.get("_error"))
+                    return False
                 replacement["enabled"] = enabled
+                self.index_replacements()
                 self.save_config()
-                print(f"✅ {'Enabled' if enabled else 'Disabled'} replacement: {name}")
+                logger.info("✅ %s replacement: %s", 'Enabled' if enabled else 'Disabled', name)
                 return True
 
-        print(f"❌ Replacement not found: {name}")
+        logger.warning("❌ Replacement not found: %s", name)
         return False
 
 
 # Example usage and testing
 if __name__ == "__main__":
     # Test the content replacer
+    logging.basicConfig(level=logging.DEBUG, format="%(message)s")
     replacer = ContentReplacer(data_dir="./test_data")
 
     # Test HTML content
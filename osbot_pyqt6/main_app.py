@@ -7,56 +7,79 @@ This version starts mitmproxy locally within the Python application
 import os
 import sys
 import signal
-import subprocess
-import time
-import threading
 import argparse
 import atexit
-import requests
-import tempfile
 import asyncio
 import json
+import gzip
+import heapq
+import logging
 from pathlib import Path
+from typing import Final, ClassVar, Optional
+
+try:                                                        # optional faster JSON parser for captures and the replacement config
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# --server-mode: the frozen app re-launches itself with this flag to run the FastAPI server in its own process
+# (handled before Qt and mitmproxy are imported, the server process never loads them)
+if __name__ == "__main__" and "--server-mode" in sys.argv:
+    import uvicorn
+    import server
+    uvicorn.run(server.app, host="127.0.0.1", port=server.args.port)
+    sys.exit(0)
 
 from osbot_utils.helpers.duration.decorators.capture_duration import capture_duration
 
 # Import the local mitmproxy implementation
-from start_mitmproxy import LocalMitmproxy, ContentCaptureAddon
+from start_mitmproxy import LocalMitmproxy, ContentCaptureAddon, CAPTURE_INDEX_FILE, CAPTURE_METADATA_FILE
+
+
+# SSL bypass flags, shared by QTWEBENGINE_CHROMIUM_FLAGS and the QApplication arguments
+_SSL_FLAGS: Final[tuple[str, ...]] = (
+    '--ignore-certificate-errors',
+    '--ignore-ssl-errors',
+    '--ignore-certificate-errors-spki-list',
+    '--ignore-urlfetcher-cert-requests',
+    '--disable-web-security',
+    '--allow-running-insecure-content',
+    '--disable-features=VizDisplayCompositor',
+    '--disable-extensions',
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu-sandbox',
+    '--ignore-certificate-errors-policy',
+)
+
+# Chromium flags passed through QTWEBENGINE_CHROMIUM_FLAGS (joined once at import)
+_CHROMIUM_FLAGS: Final[tuple[str, ...]] = _SSL_FLAGS + (
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding',
+    '--disable-field-trial-config',
+    '--disable-ipc-flooding-protection',
+)
+
+_CHROMIUM_ENV: Final[dict[str, str]] = {
+    'QTWEBENGINE_CHROMIUM_FLAGS': ' '.join(_CHROMIUM_FLAGS),
+    'QTWEBENGINE_DISABLE_SANDBOX': '1',
+    'QTWEBENGINE_REMOTE_DEBUGGING': '9222'
+}
+
+# Arguments added to sys.argv for QApplication
+_SSL_ARGS: Final[tuple[str, ...]] = _SSL_FLAGS + ('--test-type',)
 
 
 # Set environment variables BEFORE any Qt imports
 def setup_chromium_environment():
     """Set environment variables that affect Chromium/QtWebEngine SSL behavior"""
-    chromium_env_vars = {
-        'QTWEBENGINE_CHROMIUM_FLAGS': (
-            '--ignore-certificate-errors '
-            '--ignore-ssl-errors '
-            '--ignore-certificate-errors-spki-list '
-            '--ignore-urlfetcher-cert-requests '
-            '--disable-web-security '
-            '--allow-running-insecure-content '
-            '--disable-features=VizDisplayCompositor '
-            '--disable-extensions '
-            '--no-sandbox '
-            '--disable-dev-shm-usage '
-            '--disable-gpu-sandbox '
-            '--ignore-certificate-errors-policy '
-            '--allow-running-insecure-content '
-            '--disable-background-timer-throttling '
-            '--disable-backgrounding-occluded-windows '
-            '--disable-renderer-backgrounding '
-            '--disable-field-trial-config '
-            '--disable-ipc-flooding-protection'
-        ),
-        'QTWEBENGINE_DISABLE_SANDBOX': '1',
-        'QTWEBENGINE_REMOTE_DEBUGGING': '9222'
-    }
-
     print("🔧 Setting Chromium environment variables...")
-    for key, value in chromium_env_vars.items():
-        os.environ[key] = value
+    os.environ.update(_CHROMIUM_ENV)
 
-    return chromium_env_vars
+    return _CHROMIUM_ENV
 
 
 # Apply environment setup IMMEDIATELY
@@ -65,12 +88,62 @@ setup_chromium_environment()
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QWidget, QToolBar, QLineEdit, QPushButton,
                              QStatusBar, QMessageBox, QTextEdit, QTabWidget, QHBoxLayout, QCheckBox, QLabel, QGroupBox,
                              QScrollArea)
-from PyQt6.QtCore import QUrl, Qt, QProcess, pyqtSlot, QTimer, QThread, pyqtSignal
-from PyQt6.QtGui import QIcon, QAction
+from PyQt6.QtCore import QUrl, Qt, QEvent, QProcess, pyqtSlot, QTimer, QThread, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QIcon, QAction, QTextCursor
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 from PyQt6.QtWebEngineCore import QWebEngineProfile, QWebEnginePage, QWebEngineSettings
 from PyQt6.QtNetwork import QNetworkProxy
 
+# How many lines (captured flows) the capture log display keeps, older ones are dropped by the document
+CAPTURE_LOG_SIZE = 500
+
+# How long (s) the proxy thread collects captured flows before sending them to the GUI thread as one signal
+CAPTURE_BATCH_INTERVAL = 0.05
+
+# How long (ms) new capture log lines are collected before they are added to the display in one edit
+CAPTURE_LOG_FLUSH_INTERVAL = 100
+
+# How long (ms) text updates of the rules/statistics displays are collected before being applied
+TEXT_UPDATE_DELAY = 150
+
+# How many of the most recent captures a capture log rescan reads from disk
+CAPTURE_LOG_RESCAN = 50
+
+# How long (ms) to wait for the mitmproxy thread to finish on shutdown, before terminating it
+PROXY_SHUTDOWN_TIMEOUT = 2000
+
+# How long (ms) to wait for the FastAPI process to exit after terminate(), before killing it
+SERVER_SHUTDOWN_TIMEOUT = 200
+
+# FastAPI server started next to the app when running from source (the frozen app runs it via --server-mode instead)
+SERVER_SCRIPT = Path(__file__).resolve().parent / "server.py"
+
+# Longest partial line of FastAPI output left buffered in QProcess while waiting for its newline, before it is
+# logged as it is (keeps a server that writes without newlines from growing the buffer without bound)
+SERVER_OUTPUT_LINE_LIMIT = 64 * 1024
+
+
+def load_json(path):
+    """Parse a JSON file from its bytes (with orjson when it is installed), decompressing it first when path ends with .gz"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if str(path).endswith(".gz"):
+        data = gzip.decompress(data)
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def tail_lines(path, count, block_size=65536):
+    """Return the last count lines of a file, reading backwards from its end (in growing blocks) instead of all of it"""
+    with open(path, 'rb') as f:
+        end = f.seek(0, os.SEEK_END)
+        size = min(end, block_size)
+        while True:
+            f.seek(end - size)
+            lines = f.read(size).splitlines()
+            if len(lines) > count or size == end:           # more than count: the first line may be cut
+                return lines[-count:]
+            size = min(end, size * 2)
+
 
 class MitmproxyThread(QThread):
     """
@@ -78,6 +151,8 @@ class MitmproxyThread(QThread):
     """
     status_update = pyqtSignal(str)
     error_occurred = pyqtSignal(str)
+    capture_logged = pyqtSignal(list)                   # batches of captured flows, delivered on the GUI thread
+    proxy_ready = pyqtSignal()                          # emitted once mitmproxy is listening
 
     def __init__(self, port=8080, host="127.0.0.1", storage_dir=None, enable_replacement=True):
         super().__init__()
@@ -87,6 +162,7 @@ class MitmproxyThread(QThread):
         self.enable_replacement = enable_replacement
         self.proxy_server = None
         self.should_stop = False
+        self.pending_captures = []                      # only touched on the proxy's event loop
 
     def run(self):
         """Run the mitmproxy server in this thread"""
@@ -99,32 +175,51 @@ class MitmproxyThread(QThread):
                 host=self.host,
                 storage_dir=self.storage_dir,
                 verbose=True,
-                enable_replacement=self.enable_replacement
+                enable_replacement=self.enable_replacement,
+                on_capture=self.queue_capture,
+                on_ready=self.proxy_ready.emit
             )
 
             self.status_update.emit("Mitmproxy server starting...")
 
-            # Run the server (this will block)
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(self.proxy_server.start())
+            # Run the server (this will block until Master.shutdown() is called); asyncio.run cancels any
+            # tasks still pending after that and closes the loop, so the thread exits cleanly
+            asyncio.run(self.proxy_server.start())
 
         except Exception as e:
             self.error_occurred.emit(f"Mitmproxy error: {str(e)}")
 
+    def queue_capture(self, entry):
+        """Collect captured flows (on the proxy's event loop) and hand them to the GUI thread in batches"""
+        self.pending_captures.append(entry)
+        if len(self.pending_captures) == 1:
+            asyncio.get_running_loop().call_later(CAPTURE_BATCH_INTERVAL, self.flush_captures)
+
+    def flush_captures(self):
+        """Emit the flows collected since the last batch, as a single cross-thread signal"""
+        captures, self.pending_captures = self.pending_captures, []
+        self.capture_logged.emit(captures)
+
     def stop_proxy(self):
         """Stop the proxy server"""
         self.should_stop = True
         if self.proxy_server:
-            self.proxy_server.stop()
-        self.quit()
-        self.wait()
+            self.proxy_server.stop()                    # thread-safe: schedules the shutdown on the proxy's loop
+        if not self.wait(PROXY_SHUTDOWN_TIMEOUT):
+            print("⚠️  Mitmproxy did not stop in time, terminating its thread")
+            self.terminate()
+            self.wait(500)
 
     def reload_replacement_config(self):
         """Reload replacement configuration"""
         if self.proxy_server:
             self.proxy_server.reload_replacement_config()
 
+    def clear_ssl_cache(self):
+        """Clear the proxy's cached host certificates"""
+        if self.proxy_server:
+            self.proxy_server.clear_ssl_cache()
+
 
 class AggressiveSSLBypass:
     """SSL bypass configuration"""
@@ -132,30 +227,13 @@ class AggressiveSSLBypass:
     @staticmethod
     def setup_application_arguments():
         """Set up command line arguments for QApplication"""
-        ssl_args = [
-            '--ignore-certificate-errors',
-            '--ignore-ssl-errors',
-            '--ignore-certificate-errors-spki-list',
-            '--ignore-urlfetcher-cert-requests',
-            '--disable-web-security',
-            '--allow-running-insecure-content',
-            '--disable-features=VizDisplayCompositor',
-            '--no-sandbox',
-            '--disable-dev-shm-usage',
-            '--disable-gpu-sandbox',
-            '--ignore-certificate-errors-policy',
-            '--disable-extensions',
-            '--allow-running-insecure-content',
-            '--test-type'
-        ]
-
         print("🔧 Adding SSL bypass arguments to sys.argv...")
-        for arg in ssl_args:
-            if arg not in sys.argv:
-                sys.argv.append(arg)
+        existing = set(sys.argv)
+        new_args = [arg for arg in _SSL_ARGS if arg not in existing]
+        sys.argv.extend(new_args)
 
-        print(f"✅ Added {len(ssl_args)} SSL bypass arguments")
-        return ssl_args
+        print(f"✅ Added {len(new_args)} SSL bypass arguments")
+        return _SSL_ARGS
 
     @staticmethod
     def configure_web_profile(profile: QWebEngineProfile):
@@ -179,6 +257,8 @@ class AggressiveSSLBypass:
 class SuperBypassWebView(QWebEngineView):
     """WebView with maximum SSL bypass configuration"""
 
+    _profile: ClassVar[Optional[QWebEngineProfile]] = None       # shared by all views (one Chromium request context, cookie jar and cache)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setup_bypass_profile()
@@ -188,8 +268,16 @@ class SuperBypassWebView(QWebEngineView):
         try:
             print("🚀 Setting up super bypass web profile...")
 
-            self.bypass_profile = QWebEngineProfile("SuperBypass", self)
-            AggressiveSSLBypass.configure_web_profile(self.bypass_profile)
+            # Create the custom off-the-record profile (no storage name: nothing is written to disk) on first use,
+            # owned by the application so it outlives the views
+            if SuperBypassWebView._profile is None:
+                profile = QWebEngineProfile(QApplication.instance())
+                profile.setPersistentCookiesPolicy(QWebEngineProfile.PersistentCookiesPolicy.NoPersistentCookies)
+
+                # Apply aggressive SSL bypass configuration
+                AggressiveSSLBypass.configure_web_profile(profile)
+                SuperBypassWebView._profile = profile
+            self.bypass_profile = SuperBypassWebView._profile
 
             self.bypass_page = QWebEnginePage(self.bypass_profile, self)
             self.setPage(self.bypass_page)
@@ -201,6 +289,8 @@ class SuperBypassWebView(QWebEngineView):
 
 
 class WebCaptureBrowser(QMainWindow):
+    capture_log_scanned = pyqtSignal(str)                # emitted from a pool thread when a capture log rescan is done
+
     def __init__(self, api_port=8000, debug_port=9222, proxy_port=8080, enable_replacement=True):
         super().__init__()
 
@@ -213,6 +303,13 @@ class WebCaptureBrowser(QMainWindow):
         self.fastapi_process = None
         self.mitmproxy_thread = None
         self.storage_dir = Path("./captures")
+        self.capture_metadata_cache = {}                     # capture dir path -> (dir mtime_ns, parsed metadata)
+
+        # Text waiting to be shown in the rules/statistics displays (see set_text)
+        self.pending_texts = {}
+        self.applied_texts = {}                             # text edit -> (text, document revision) last set
+        self.text_update_timer = QTimer(self, singleShot=True, interval=TEXT_UPDATE_DELAY)
+        self.text_update_timer.timeout.connect(self.apply_pending_texts)
 
         # Set window properties
         self.setWindowTitle("Web-Content-Capture-MVP (Integrated Mitmproxy)")
@@ -221,13 +318,10 @@ class WebCaptureBrowser(QMainWindow):
         # Create UI
         self.setup_ui()
 
-        # Start services
+        # Start services (the proxy configuration and initial URL load wait for proxy_ready, see on_proxy_ready)
         self.start_fastapi_server()
         self.start_mitmproxy_server()
 
-        # Set up proxy configuration after mitmproxy starts
-        QTimer.singleShot(3000, self.setup_proxy_configuration)
-
         atexit.register(self.cleanup)
 
     def setup_ui(self):
@@ -259,6 +353,7 @@ class WebCaptureBrowser(QMainWindow):
         self.replacement_layout = QVBoxLayout(self.replacement_tab)
         self.setup_replacement_tab()
         self.tab_widget.addTab(self.replacement_tab, "Content Replacement")
+        self.tab_widget.currentChanged.connect(self.update_replacement_refresh_timer)
 
         self.status_bar = QStatusBar()
         self.setStatusBar(self.status_bar)
@@ -268,18 +363,15 @@ class WebCaptureBrowser(QMainWindow):
         self.toolbar = QToolBar("Navigation")
         self.addToolBar(self.toolbar)
 
-        # Navigation buttons
-        back_action = QAction("Back", self)
-        back_action.triggered.connect(lambda: self.web_view.back())
-        self.toolbar.addAction(back_action)
+        # Navigation buttons (connected to the web view in setup_browser, once it exists)
+        self.back_action = QAction("Back", self)
+        self.toolbar.addAction(self.back_action)
 
-        forward_action = QAction("Forward", self)
-        forward_action.triggered.connect(lambda: self.web_view.forward())
-        self.toolbar.addAction(forward_action)
+        self.forward_action = QAction("Forward", self)
+        self.toolbar.addAction(self.forward_action)
 
-        reload_action = QAction("Reload", self)
-        reload_action.triggered.connect(lambda: self.web_view.reload())
-        self.toolbar.addAction(reload_action)
+        self.reload_action = QAction("Reload", self)
+        self.toolbar.addAction(self.reload_action)
 
         # URL entry
         self.url_edit = QLineEdit()
@@ -338,22 +430,31 @@ class WebCaptureBrowser(QMainWindow):
 
         self.web_view = SuperBypassWebView(self)
         self.web_view.loadFinished.connect(self.on_load_finished)
+        self.back_action.triggered.connect(self.web_view.back)
+        self.forward_action.triggered.connect(self.web_view.forward)
+        self.reload_action.triggered.connect(self.web_view.reload)
         self.web_view.loadStarted.connect(lambda: self.status_bar.showMessage("Loading..."))
 
         self.browser_layout.addWidget(self.web_view)
 
-        # Initial URL loading
-        QTimer.singleShot(5000, self.load_initial_url)
-
     def setup_capture_log(self):
         """Set up the capture log display"""
         self.capture_log = QTextEdit()
         self.capture_log.setReadOnly(True)
         self.capture_log.setStyleSheet("font-family: monospace; font-size: 12px;")
+        self.capture_log.document().setMaximumBlockCount(CAPTURE_LOG_SIZE)
         self.log_layout.addWidget(self.capture_log)
 
-        # Add refresh button
-        refresh_button = QPushButton("Refresh Capture Log")
+        # Lines waiting for the next flush_capture_log
+        self.capture_log_buffer = []
+        self.capture_log_flush_pending = False
+
+        # Rescans read the disk on a pool thread, see refresh_capture_log
+        self.capture_log_scanning = False
+        self.capture_log_scanned.connect(self.on_capture_log_scanned)
+
+        # Add rescan button (the log is otherwise fed live by the proxy, see on_capture_logged)
+        refresh_button = QPushButton("Rescan Capture Directory")
         refresh_button.clicked.connect(self.refresh_capture_log)
         self.log_layout.addWidget(refresh_button)
 
@@ -422,10 +523,25 @@ class WebCaptureBrowser(QMainWindow):
         scroll_area.setWidget(scroll_widget)
         self.replacement_layout.addWidget(scroll_area)
 
-        # Auto-refresh timer
+        # Auto-refresh timer (only runs while the tab is visible, see update_replacement_refresh_timer)
         self.replacement_refresh_timer = QTimer()
+        self.replacement_refresh_timer.setInterval(5000)  # Refresh every 5 seconds
         self.replacement_refresh_timer.timeout.connect(self.refresh_replacement_stats)
-        self.replacement_refresh_timer.start(5000)  # Refresh every 5 seconds
+
+    def update_replacement_refresh_timer(self):
+        """Run the statistics auto-refresh only while the replacement tab is shown and the window isn't minimized"""
+        visible = self.tab_widget.currentWidget() is self.replacement_tab and not self.isMinimized()
+        if visible and not self.replacement_refresh_timer.isActive():
+            self.refresh_replacement_stats()
+            self.replacement_refresh_timer.start()
+        elif not visible:
+            self.replacement_refresh_timer.stop()
+
+    def changeEvent(self, event):
+        """Pause/resume the statistics auto-refresh when the window is minimized/restored"""
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.WindowStateChange and hasattr(self, 'replacement_refresh_timer'):
+            self.update_replacement_refresh_timer()
 
     def start_mitmproxy_server(self):
         """Start the integrated mitmproxy server"""
@@ -446,6 +562,8 @@ class WebCaptureBrowser(QMainWindow):
             # Connect signals
             self.mitmproxy_thread.status_update.connect(self.on_mitmproxy_status)
             self.mitmproxy_thread.error_occurred.connect(self.on_mitmproxy_error)
+            self.mitmproxy_thread.capture_logged.connect(self.on_capture_logged)
+            self.mitmproxy_thread.proxy_ready.connect(self.on_proxy_ready)
 
             # Start the thread
             self.mitmproxy_thread.start()
@@ -456,31 +574,66 @@ class WebCaptureBrowser(QMainWindow):
             print(f"❌ Error starting mitmproxy: {e}")
             self.proxy_status_button.setText("Proxy: ❌ Error")
 
+    @pyqtSlot(str)
     def on_mitmproxy_status(self, message):
         """Handle mitmproxy status updates"""
-        print(f"📡 Mitmproxy: {message}")
+        logger.debug("📡 Mitmproxy: %s", message)
         self.status_bar.showMessage(message)
 
-        if "starting" in message.lower():
-            self.proxy_status_button.setText("Proxy: ✅ Running")
-            self.capture_status_button.setText("Capture: ✅ Active")
+    @pyqtSlot()
+    def on_proxy_ready(self):
+        """Mitmproxy is listening: route the browser through it and load the initial URL"""
+        self.proxy_status_button.setText("Proxy: ✅ Running")
+        self.capture_status_button.setText("Capture: ✅ Active")
+        self.setup_proxy_configuration()
+        self.load_initial_url()
 
+    @pyqtSlot(str)
     def on_mitmproxy_error(self, error_message):
         """Handle mitmproxy errors"""
-        print(f"❌ Mitmproxy error: {error_message}")
+        logger.error("❌ Mitmproxy error: %s", error_message)
         self.proxy_status_button.setText("Proxy: ❌ Error")
         self.status_bar.showMessage(f"Mitmproxy error: {error_message}")
 
+        # The proxy never became ready (e.g. its port is in use): load the initial URL directly instead of leaving
+        # the browser blank (no application proxy was set, that only happens in on_proxy_ready)
+        if self.web_view.url().isEmpty():
+            self.load_initial_url()
+
+    @pyqtSlot(list)
+    def on_capture_logged(self, entries):
+        """Queue a batch of captured flows for the capture log (a burst of flows is added to the widget in one edit)"""
+        for entry in entries:
+            modification_indicator = "🔄" if entry.get("content_modified") else "📡"
+            self.capture_log_buffer.append(f"{modification_indicator} [{entry['timestamp']}] {entry['status']} - {entry['url']}")
+
+        if not self.capture_log_flush_pending:
+            self.capture_log_flush_pending = True
+            QTimer.singleShot(CAPTURE_LOG_FLUSH_INTERVAL, self.flush_capture_log)
+
+    @pyqtSlot()
+    def flush_capture_log(self):
+        """Add the queued capture log lines to the display"""
+        self.capture_log_flush_pending = False
+        if not self.capture_log_buffer:
+            return
+
+        text = "\n".join(self.capture_log_buffer)
+        self.capture_log_buffer.clear()
+        if not self.capture_log.document().isEmpty():
+            text = "\n" + text
+        self.capture_log.moveCursor(QTextCursor.MoveOperation.End)
+        self.capture_log.insertPlainText(text)
+
     def setup_proxy_configuration(self):
         """Set up proxy configuration"""
         try:
             print(f"🔧 Setting up proxy: localhost:{self.proxy_port}")
 
-            proxy = QNetworkProxy()
-            proxy.setType(QNetworkProxy.ProxyType.HttpProxy)
-            proxy.setHostName("localhost")
-            proxy.setPort(self.proxy_port)
-            QNetworkProxy.setApplicationProxy(proxy)
+            proxy = QNetworkProxy(QNetworkProxy.ProxyType.HttpProxy, "localhost", self.proxy_port)
+            # Setting the application proxy makes QtWebEngine reconfigure its network stack, skip it if nothing changed
+            if QNetworkProxy.applicationProxy() != proxy:
+                QNetworkProxy.setApplicationProxy(proxy)
 
             self.status_bar.showMessage(f"Proxy configured: localhost:{self.proxy_port}")
 
@@ -488,36 +641,80 @@ class WebCaptureBrowser(QMainWindow):
             print(f"❌ Proxy setup error: {e}")
 
     def refresh_capture_log(self):
-        """Refresh the capture log display"""
+        """Rescan the storage directory and rebuild the capture log display (the scan runs on a pool thread)"""
+        if self.capture_log_scanning:
+            return
+        self.capture_log_scanning = True
+        QThreadPool.globalInstance().start(lambda: self.capture_log_scanned.emit(self.scan_capture_log()))
+
+    @pyqtSlot(str)
+    def on_capture_log_scanned(self, log_content):
+        """Show the result of a capture log rescan"""
+        self.capture_log_scanning = False
+        self.capture_log.setPlainText(log_content)
+
+    def scan_capture_log(self):
+        """Build the capture log text from the storage directory (called off the GUI thread, one scan at a time)"""
         try:
             # Read capture files from storage directory
             log_content = f"Capture Storage Directory: {self.storage_dir}\n"
             log_content += "=" * 50 + "\n\n"
 
-            if self.storage_dir.exists():
+            index_file = self.storage_dir / CAPTURE_INDEX_FILE
+            if index_file.exists():
+                # The proxy's capture index lists the latest flows at its end: no directory walk or JSON parsing
+                with capture_duration(action_name="load logs from index") as duration:
+                    lines = tail_lines(index_file, CAPTURE_LOG_RESCAN)
+                log_content += f"Captures loaded in : {duration.seconds}\n\n"
+
+                for line in reversed(lines):
+                    fields = line.decode('utf-8', errors='replace').split("\t", 3)
+                    if len(fields) != 4:
+                        continue
+                    timestamp, status, content_modified, url = fields
+                    modification_indicator = "🔄" if content_modified == "1" else "📡"
+                    log_content += f"{modification_indicator} [{timestamp}] {status} - {url}\n"
+
+            elif self.storage_dir.exists():
                 with capture_duration(action_name="load logs from disk") as duration:
-                    capture_dirs = [d for d in self.storage_dir.iterdir() if d.is_dir()]
+                    with os.scandir(self.storage_dir) as entries:
+                        capture_dirs = [entry for entry in entries if entry.is_dir()]
                     log_content += f"Total Captures: {len(capture_dirs)}\n\n"
 
-                    # Sort by actual timestamp from metadata
+                    # Only the most recent captures are parsed, picked by directory mtime (set when the capture is
+                    # written) instead of opening every metadata file just to read its timestamp
+                    recent_dirs = heapq.nlargest(CAPTURE_LOG_RESCAN, capture_dirs, key=lambda entry: entry.stat().st_mtime_ns)
+
+                    # The metadata is written once, when the capture completes, which also bumps its directory's
+                    # mtime: an unchanged directory mtime means the metadata parsed by the previous rescan is current
+                    metadata_cache = {}
                     capture_items = []
-                    for capture_dir in capture_dirs:
-                        metadata_file = capture_dir / "metadata.json"
-                        if metadata_file.exists():
-                            try:
-                                with open(metadata_file, 'r') as f:
-                                    metadata = json.load(f)
-                                timestamp = metadata.get("timestamp", "")
-                                capture_items.append((timestamp, capture_dir, metadata))
-                            except:
-                                # If we can't read metadata, use folder name as fallback
-                                capture_items.append(("", capture_dir, None))
+                    for capture_dir in recent_dirs:
+                        try:
+                            mtime = capture_dir.stat().st_mtime_ns          # cached by the DirEntry, no extra syscall
+                            cached = self.capture_metadata_cache.get(capture_dir.path)
+                            if cached and cached[0] == mtime:
+                                metadata = cached[1]
+                            else:
+                                try:
+                                    metadata = load_json(os.path.join(capture_dir.path, CAPTURE_METADATA_FILE))
+                                except FileNotFoundError:               # captured before metadata was gzipped
+                                    metadata = load_json(os.path.join(capture_dir.path, "metadata.json"))
+                            metadata_cache[capture_dir.path] = (mtime, metadata)
+                            timestamp = metadata.get("timestamp", "")
+                            capture_items.append((timestamp, capture_dir, metadata))
+                        except FileNotFoundError:
+                            continue
+                        except:
+                            # If we can't read metadata, use folder name as fallback
+                            capture_items.append(("", capture_dir, None))
+                    self.capture_metadata_cache = metadata_cache         # only keep the captures still listed
 
                 log_content += f"Captures loaded in : {duration.seconds}\n\n"
-                # Sort by timestamp (most recent first) and take last 50
+                # Sort by timestamp (most recent first)
                 capture_items.sort(key=lambda x: x[0], reverse=True)
 
-                for timestamp, capture_dir, metadata in capture_items[:50]:
+                for timestamp, capture_dir, metadata in capture_items:
                     if metadata:
                         url = metadata.get("request", {}).get("url", "Unknown")
                         status = metadata.get("response", {}).get("status_code", "Unknown")
@@ -550,10 +747,10 @@ class WebCaptureBrowser(QMainWindow):
             else:
                 log_content += "No captures found.\n"
 
-            self.capture_log.setPlainText(log_content)
+            return log_content
 
         except Exception as e:
-            self.capture_log.setPlainText(f"Error refreshing log: {e}")
+            return f"Error refreshing log: {e}"
 
     def reload_replacement_config(self):
         """Reload replacement configuration"""
@@ -600,13 +797,30 @@ class WebCaptureBrowser(QMainWindow):
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Error opening configuration file: {e}")
 
+    def set_text(self, text_edit, text):
+        """Show text in text_edit, updates arriving within TEXT_UPDATE_DELAY ms are applied once"""
+        self.pending_texts[text_edit] = text
+        if not self.text_update_timer.isActive():
+            self.text_update_timer.start()
+
+    @pyqtSlot()
+    def apply_pending_texts(self):
+        """Apply the latest pending text of each display, skipping displays that already show it"""
+        pending, self.pending_texts = self.pending_texts, {}
+        for text_edit, text in pending.items():
+            if self.applied_texts.get(text_edit) == (text, text_edit.document().revision()):
+                continue                                    # unchanged (e.g. stats re-read every 5 seconds)
+            text_edit.setUpdatesEnabled(False)
+            text_edit.setPlainText(text)
+            text_edit.setUpdatesEnabled(True)
+            self.applied_texts[text_edit] = (text, text_edit.document().revision())
+
     def refresh_replacement_rules_display(self):
         """Refresh the replacement rules display"""
         config_file = self.storage_dir / "replacements.json"
         if config_file.exists():
             try:
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
+                config = load_json(config_file)
 
                 rules_text = "Replacement Rules:\n"
                 rules_text += "=" * 50 + "\n\n"
@@ -624,12 +838,12 @@ class WebCaptureBrowser(QMainWindow):
                 if not replacements:
                     rules_text += "No replacement rules defined.\n"
 
-                self.replacement_rules_display.setPlainText(rules_text)
+                self.set_text(self.replacement_rules_display, rules_text)
 
             except Exception as e:
-                self.replacement_rules_display.setPlainText(f"Error reading rules: {e}")
+                self.set_text(self.replacement_rules_display, f"Error reading rules: {e}")
         else:
-            self.replacement_rules_display.setPlainText("Configuration file does not exist yet.")
+            self.set_text(self.replacement_rules_display, "Configuration file does not exist yet.")
 
     def refresh_replacement_stats(self):
         """Refresh replacement statistics display"""
@@ -645,8 +859,7 @@ class WebCaptureBrowser(QMainWindow):
                 config_file = self.storage_dir / "replacements.json"
                 if config_file.exists():
                     try:
-                        with open(config_file, 'r') as f:
-                            config = json.load(f)
+                        config = load_json(config_file)
 
                         stats = config.get("stats", {})
                         if stats:
@@ -656,10 +869,10 @@ class WebCaptureBrowser(QMainWindow):
                     except:
                         pass
 
-            self.replacement_stats_display.setPlainText(stats_text)
+            self.set_text(self.replacement_stats_display, stats_text)
 
         except Exception as e:
-            self.replacement_stats_display.setPlainText(f"Error getting stats: {e}")
+            self.set_text(self.replacement_stats_display, f"Error getting stats: {e}")
 
     def show_proxy_status(self):
         """Show proxy status dialog"""
@@ -682,8 +895,13 @@ Content Capture: Automatic for all HTTP/HTTPS requests"""
         msg.setWindowTitle("Integrated Proxy Status")
         msg.setText("Local Mitmproxy Server")
         msg.setInformativeText(status_text)
+        clear_ssl_button = msg.addButton("Clear SSL Cache", QMessageBox.ButtonRole.ActionRole)
+        msg.addButton(QMessageBox.StandardButton.Ok)
         msg.exec()
 
+        if msg.clickedButton() == clear_ssl_button and self.mitmproxy_thread:
+            self.mitmproxy_thread.clear_ssl_cache()
+
     def show_ssl_status(self):
         """Show SSL configuration status"""
         status_text = """SSL Bypass Configuration:
@@ -707,7 +925,8 @@ All content is captured automatically."""
     def show_capture_status(self):
         """Show content capture status"""
         if self.storage_dir.exists():
-            capture_count = len([d for d in self.storage_dir.iterdir() if d.is_dir()])
+            with os.scandir(self.storage_dir) as entries:       # DirEntry.is_dir uses the type from the listing, no stat
+                capture_count = sum(1 for entry in entries if entry.is_dir())
         else:
             capture_count = 0
 
@@ -718,7 +937,7 @@ Total Captures: {capture_count}
 Capture Format: JSON metadata + content files
 
 Each captured request/response is stored with:
-- metadata.json (URL, headers, timestamps)
+- metadata.json.gz (URL, headers, timestamps)
 - response.html/json/txt/bin (actual content)
 - request.bin (if request has body)
 
@@ -778,41 +997,39 @@ Check the 'Content Replacement' tab to configure rules."""
         if success:
             self.status_bar.showMessage(f"✅ Loaded: {self.web_view.url().toString()}")
             self.url_edit.setText(self.web_view.url().toString())
-            # Auto-refresh capture log when page loads
-            QTimer.singleShot(1000, self.refresh_capture_log)
         else:
             self.status_bar.showMessage("❌ Failed to load page")
 
     def start_fastapi_server(self):
         """Start FastAPI server"""
         try:
-            server_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py")
-            python_executable = sys.executable
-
+            # The server always runs in its own process: the frozen app starts itself in --server-mode
             if getattr(sys, 'frozen', False):
-                def run_server():
-                    import server
-                    import uvicorn
-                    uvicorn.run(server.app, host="127.0.0.1", port=self.api_port)
-
-                server_thread = threading.Thread(target=run_server)
-                server_thread.daemon = True
-                server_thread.start()
+                arguments = ['--server-mode', '--port', str(self.api_port)]
             else:
-                cmd = [python_executable, server_path, '--port', str(self.api_port)]
-                self.fastapi_process = QProcess()
-                self.fastapi_process.setProcessChannelMode(QProcess.ProcessChannelMode.MergedChannels)
-                self.fastapi_process.readyReadStandardOutput.connect(self.handle_server_output)
-                self.fastapi_process.start(python_executable, cmd[1:])
+                arguments = [str(SERVER_SCRIPT), '--port', str(self.api_port)]
+
+            self.fastapi_process = QProcess()
+            self.fastapi_process.setProcessChannelMode(QProcess.ProcessChannelMode.MergedChannels)
+            self.fastapi_process.readyReadStandardOutput.connect(self.handle_server_output)
+            self.fastapi_process.start(sys.executable, arguments)
 
         except Exception as e:
             print(f"❌ FastAPI server error: {e}")
 
+    @pyqtSlot()
     def handle_server_output(self):
-        """Handle FastAPI server output"""
+        """Handle FastAPI server output (complete lines only, a partial line stays buffered in QProcess)"""
         if self.fastapi_process:
-            data = self.fastapi_process.readAllStandardOutput().data().decode()
-            print(f"FastAPI: {data.strip()}")
+            debug = logger.isEnabledFor(logging.DEBUG)
+            while self.fastapi_process.canReadLine():               # always read (to drain the pipe), only log at DEBUG
+                line = self.fastapi_process.readLine().data()
+                if debug:
+                    logger.debug("FastAPI: %s", line.decode('utf-8', errors='replace').rstrip())
+            if self.fastapi_process.bytesAvailable() > SERVER_OUTPUT_LINE_LIMIT:
+                line = self.fastapi_process.readAll().data()
+                if debug:
+                    logger.debug("FastAPI: %s", line.decode('utf-8', errors='replace').rstrip())
 
     def cleanup(self):
         """Cleanup on exit"""
@@ -829,9 +1046,9 @@ Check the 'Content Replacement' tab to configure rules."""
         # Stop FastAPI
         if hasattr(self, 'fastapi_process') and self.fastapi_process:
             self.fastapi_process.terminate()
-            self.fastapi_process.waitForFinished(1000)
-            if self.fastapi_process.state() == QProcess.ProcessState.Running:
+            if not self.fastapi_process.waitForFinished(SERVER_SHUTDOWN_TIMEOUT):
                 self.fastapi_process.kill()
+                self.fastapi_process.waitForFinished(500)
 
 
 def main():
@@ -841,9 +1058,12 @@ def main():
     parser.add_argument('--debug-port', type=int, default=9222, help='Debug port')
     parser.add_argument('--proxy-port', type=int, default=8080, help='mitmproxy port')
     parser.add_argument('--no-replacement', action='store_true', help='Disable content replacement')
+    parser.add_argument('--verbose', action='store_true', help='Log proxy status and FastAPI output')
 
     args, unknown = parser.parse_known_args()
 
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="%(message)s")
+
     # Apply SSL bypass arguments
     AggressiveSSLBypass.setup_application_arguments()
 
@@ -15,7 +15,7 @@ from pathlib import Path
 # Parse command line arguments
 parser = argparse.ArgumentParser(description='FastAPI Server for Web Content Capture')
 parser.add_argument('--port', type=int, default=8000, help='Port to run the server on')
-args = parser.parse_args()
+args, _ = parser.parse_known_args()                 # also imported by main_app --server-mode, whose own flags are ignored here
 
 # Create the FastAPI app
 app = FastAPI(
@@ -4,7 +4,10 @@ Local mitmproxy implementation to replace Docker instance
 This runs mitmproxy directly in Python with custom addons for content capture
 """
 
+import os
 import sys
+import gzip
+import base64
 import asyncio
 import threading
 import time
@@ -13,6 +16,12 @@ import hashlib
 from pathlib import Path
 from datetime import datetime
 import argparse
+import logging
+
+try:                                                        # optional faster JSON serializer for the capture metadata
+    import orjson
+except ImportError:
+    orjson = None
 
 # mitmproxy imports
 from mitmproxy import options, master
@@ -26,6 +35,55 @@ except ImportError:
     print("⚠️  ContentReplacer not found. Content replacement will be disabled.")
     ContentReplacer = None
 
+# Forged per-host certificates kept in memory by mitmproxy's CertStore (its default is 100, which an
+# interactive browsing session across many hosts quickly cycles through, re-signing leaf certs)
+CERT_CACHE_SIZE = 1024
+
+# Response bodies above this size are streamed to the client (and tee'd to disk) instead of being buffered
+STREAM_LARGE_BODIES = "1m"
+
+# How captures are stored: "files" (a directory per flow with metadata.json.gz and the bodies) or
+# "jsonl" (one gzipped JSON line per flow, bodies base64 encoded, in a single file per session)
+CAPTURE_FORMATS = ("files", "jsonl")
+
+# One "{timestamp}\t{status}\t{content_modified 0/1}\t{url}" line per captured flow (whatever the capture
+# format), appended as flows are captured so the most recent ones can be listed by reading the end of the file
+CAPTURE_INDEX_FILE = "index.tsv"
+
+# Per-flow capture metadata, gzipped (at level 1, which costs about as much as the write itself and
+# shrinks the indented JSON several times over). Captures written before it was compressed use metadata.json
+CAPTURE_METADATA_FILE = "metadata.json.gz"
+
+
+def write_json(path, data):
+    """Write data to path as indented JSON, serialized in one go and written with unbuffered os.write calls
+       (gzip compressed when path ends with .gz)"""
+    if orjson:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    else:
+        payload = json.dumps(data, indent=2).encode()
+    if str(path).endswith(".gz"):
+        payload = gzip.compress(payload, compresslevel=1)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(payload)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def response_extension(content_type):
+    """File extension used for a captured response body with this content type"""
+    content_type = content_type.lower()
+    if "html" in content_type:
+        return "html"
+    if "json" in content_type:
+        return "json"
+    if any(t in content_type for t in ["css", "javascript", "text"]):
+        return "txt"
+    return "bin"                                    # Binary content (images, etc.)
+
 
 class ContentCaptureAddon:
     """
@@ -33,13 +91,20 @@ class ContentCaptureAddon:
     This will be the core of our content capture functionality
     """
 
-    def __init__(self, storage_dir=None, verbose=True, enable_replacement=True):
+    def __init__(self, storage_dir=None, verbose=True, enable_replacement=True, on_capture=None, on_ready=None,
+                 capture_format="files"):
         self.storage_dir = Path(storage_dir) if storage_dir else Path("./captures")
         self.storage_dir.mkdir(parents=True, exist_ok=True)
         self.verbose = verbose
         self.enable_replacement = enable_replacement
+        self.on_capture = on_capture                # called with a short log entry for every captured flow
+        self.on_ready = on_ready                    # called once the proxy is listening
+        self.capture_format = capture_format
         self.captured_flows = []
         self.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.session_log = None                     # gzip file of the "jsonl" capture format, opened on first use
+        self.index_file = None                      # CAPTURE_INDEX_FILE, opened on first use
+        self.open_streams = {}                      # flow.id -> response.bin of a streamed body still being written
 
         # Initialize ContentReplacer if available and enabled
         self.content_replacer = None
@@ -59,6 +124,7 @@ class ContentCaptureAddon:
         print(f"🔧 Content Capture Addon initialized")
         print(f"   Storage directory: {self.storage_dir}")
         print(f"   Session ID: {self.session_id}")
+        print(f"   Capture format: {self.capture_format}")
         print(f"   Content replacement: {'✅ Enabled' if self.content_replacer else '❌ Disabled'}")
 
     def load(self, loader):
@@ -77,6 +143,94 @@ class ContentCaptureAddon:
         )
         print("✅ Content Capture Addon loaded")
 
+    def running(self):
+        """Called once mitmproxy has bound its listen sockets and is ready to accept connections"""
+        if self.on_ready:
+            self.on_ready()
+
+    def done(self):
+        """Called when mitmproxy shuts down"""
+        if self.session_log:
+            self.session_log.close()
+            self.session_log = None
+        if self.index_file:
+            self.index_file.close()
+            self.index_file = None
+        for flow_id in list(self.open_streams):
+            self.close_stream(flow_id)
+
+    def error(self, flow: http.HTTPFlow):
+        """Called when a flow fails (e.g. the connection is reset): a streamed body won't get its final chunk"""
+        if flow.id in self.open_streams:
+            self.close_stream(flow.id)
+            print(f"⚠️  Streamed response aborted: {flow.request.pretty_url}")
+
+    def responseheaders(self, flow: http.HTTPFlow):
+        """Called when the response headers arrive, large bodies that mitmproxy will stream are tee'd to disk"""
+        try:
+            if flow.response.stream is True and ctx.options.capture_enabled:
+                flow.response.stream = self.stream_to_file(flow)
+        except Exception as e:
+            print(f"❌ Error setting up response stream for {flow.request.pretty_url}: {e}")
+
+    def stream_to_file(self, flow: http.HTTPFlow):
+        """Return a flow.response.stream callable that (after content replacement) writes each chunk to disk as it is forwarded"""
+        flow_dir = self.storage_dir / self.flow_id(flow)
+        flow_dir.mkdir(exist_ok=True)
+        capture_stream = {"file": str(flow_dir / "response.bin"), "size": 0, "replacements": [0]}
+        flow.metadata["capture_stream"] = capture_stream
+        process = self.stream_replacer(flow, capture_stream["replacements"])
+        target = open(capture_stream["file"], 'wb')
+        self.open_streams[flow.id] = target
+
+        def tee(chunk):
+            end = not chunk                             # b"" marks the end of the body
+            if process:
+                chunk = process(chunk)
+            if chunk:
+                target.write(chunk)
+                capture_stream["size"] += len(chunk)
+            if end:
+                target.close()
+                self.open_streams.pop(flow.id, None)
+                return chunk
+            return chunk or []                          # an empty data frame would end a chunked HTTP/1 body early
+
+        return tee
+
+    def stream_replacer(self, flow: http.HTTPFlow, replacements):
+        """
+        Content replacement for a streamed body (None when it can't be rewritten on the fly: compressed on the wire,
+        or not every applicable rule is a literal). The headers are forwarded before the body, so the content-length
+        the rewritten body no longer matches is replaced by chunked framing.
+        """
+        if not (self.content_replacer and ctx.options.replacement_enabled):
+            return None
+        if flow.response.headers.get("content-encoding", "identity").lower() != "identity":
+            return None
+        process = self.content_replacer.stream_processor(flow.response.headers.get("content-type", ""), replacements,
+                                                         flow.request.pretty_url)
+        if process:
+            flow.response.headers.pop("content-length", None)
+            if flow.response.http_version == "HTTP/1.1":
+                flow.response.headers["transfer-encoding"] = "chunked"
+        return process
+
+    def close_stream(self, flow_id):
+        """Close the response.bin of a stream that never completed, renamed to response.bin.incomplete"""
+        target = self.open_streams.pop(flow_id)
+        target.close()
+        try:
+            os.replace(target.name, target.name + ".incomplete")
+        except OSError as e:
+            print(f"❌ Error marking incomplete stream {target.name}: {e}")
+
+    def flow_id(self, flow: http.HTTPFlow):
+        """Unique ID for a flow (also the name of its capture directory)"""
+        return hashlib.sha256(
+            f"{flow.request.pretty_url}_{flow.request.timestamp_start}".encode()
+        ).hexdigest()[:16]
+
     def response(self, flow: http.HTTPFlow):
         """Called when we receive a response from the server"""
         try:
@@ -88,21 +242,26 @@ class ContentCaptureAddon:
             response_status = flow.response.status_code
             content_type = flow.response.headers.get("content-type", "unknown")
 
+            # Decoded body, read once: every flow.response.content access re-checks (and may redo) the decoding
+            content = flow.response.content
+            content_modified = False
+
             # Apply content replacement BEFORE capturing
-            if self.content_replacer and ctx.options.replacement_enabled and flow.response.content:
+            if self.content_replacer and ctx.options.replacement_enabled and content:
                 try:
-                    original_content = flow.response.content
                     modified_content = self.content_replacer.process_content(
-                        original_content,
+                        content,
                         content_type,
                         request_url
                     )
 
                     # Update the response content if it was modified
-                    if modified_content != original_content:
+                    if modified_content is not content and modified_content != content:
                         flow.response.content = modified_content
+                        content = modified_content
+                        content_modified = True
                         # Update content length header
-                        flow.response.headers["content-length"] = str(len(modified_content))
+                        flow.response.headers["content-length"] = str(len(flow.response.raw_content))
                         if self.verbose:
                             print(f"🔄 Content modified for: {request_url}")
 
@@ -110,9 +269,10 @@ class ContentCaptureAddon:
                     print(f"❌ Error in content replacement for {request_url}: {e}")
 
             # Generate unique ID for this flow
-            flow_id = hashlib.sha256(
-                f"{request_url}_{flow.request.timestamp_start}".encode()
-            ).hexdigest()[:16]
+            flow_id = self.flow_id(flow)
+            capture_stream = flow.metadata.get("capture_stream")
+            if capture_stream and capture_stream["replacements"][0]:
+                content_modified = True
 
             # Create capture data
             capture_data = {
@@ -132,17 +292,30 @@ class ContentCaptureAddon:
                     "status_code": response_status,
                     "headers": dict(flow.response.headers),
                     "content_type": content_type,
-                    "content_length": len(flow.response.content) if flow.response.content else 0,
-                    "content_modified": flow.response.content != getattr(flow.response, '_original_content',
-                                                                         flow.response.content)
+                    "content_length": capture_stream["size"] if capture_stream else len(content) if content else 0,
+                    "streamed": capture_stream is not None,
+                    "content_modified": content_modified
                 }
             }
 
             # Store the content based on type
-            self.store_content(flow, capture_data)
+            if self.capture_format == "jsonl":
+                self.log_flow(flow, capture_data, content)
+            else:
+                self.store_content(flow, capture_data, content)
 
             # Add to captured flows list
             self.captured_flows.append(capture_data)
+            self.index_flow(capture_data)
+
+            # Notify listeners (e.g. the GUI capture log) without them having to re-read the storage directory
+            if self.on_capture:
+                self.on_capture({
+                    "timestamp": capture_data["timestamp"],
+                    "status": response_status,
+                    "url": request_url,
+                    "content_modified": capture_data["response"]["content_modified"]
+                })
 
             if self.verbose:
                 modification_indicator = "🔄" if capture_data["response"]["content_modified"] else "📡"
@@ -152,8 +325,8 @@ class ContentCaptureAddon:
         except Exception as e:
             print(f"❌ Error in response handler: {e}")
 
-    def store_content(self, flow: http.HTTPFlow, capture_data: dict):
-        """Store the actual content based on its type"""
+    def store_content(self, flow: http.HTTPFlow, capture_data: dict, content=None):
+        """Store the actual content based on its type (content: the already decoded response body, if at hand)"""
         try:
             flow_id = capture_data["flow_id"]
             content_type = capture_data["response"]["content_type"]
@@ -162,75 +335,82 @@ class ContentCaptureAddon:
             flow_dir = self.storage_dir / flow_id
             flow_dir.mkdir(exist_ok=True)
 
-            # Store metadata
-            metadata_file = flow_dir / "metadata.json"
-            with open(metadata_file, 'w') as f:
-                json.dump(capture_data, f, indent=2)
+            metadata_file = flow_dir / CAPTURE_METADATA_FILE
 
             # Store request content if it exists
-            if flow.request.content:
+            request_content = flow.request.content
+            if request_content:
                 request_file = flow_dir / "request.bin"
                 with open(request_file, 'wb') as f:
-                    f.write(flow.request.content)
+                    f.write(request_content)
 
             # Store response content
-            if flow.response.content:
-                # Determine file extension based on content type
-                if "html" in content_type.lower():
-                    response_file = flow_dir / "response.html"
-                    content = flow.response.content
-                    # Try to decode as text
-                    try:
-                        content_text = content.decode('utf-8')
-                        with open(response_file, 'w', encoding='utf-8') as f:
-                            f.write(content_text)
-                    except UnicodeDecodeError:
-                        # Fall back to binary
-                        with open(response_file, 'wb') as f:
-                            f.write(content)
-
-                elif "json" in content_type.lower():
-                    response_file = flow_dir / "response.json"
-                    try:
-                        # Pretty print JSON
-                        json_data = json.loads(flow.response.content.decode('utf-8'))
-                        with open(response_file, 'w') as f:
-                            json.dump(json_data, f, indent=2)
-                    except:
-                        # Fall back to raw content
-                        with open(response_file, 'wb') as f:
-                            f.write(flow.response.content)
-
-                elif any(t in content_type.lower() for t in ["css", "javascript", "text"]):
-                    response_file = flow_dir / "response.txt"
-                    try:
-                        with open(response_file, 'w', encoding='utf-8') as f:
-                            f.write(flow.response.content.decode('utf-8'))
-                    except UnicodeDecodeError:
-                        with open(response_file, 'wb') as f:
-                            f.write(flow.response.content)
-
-                else:
-                    # Binary content (images, etc.)
-                    response_file = flow_dir / "response.bin"
-                    with open(response_file, 'wb') as f:
-                        f.write(flow.response.content)
-
-                # Update metadata with file paths
+            if content is None:
+                content = flow.response.content
+            if content:
+                # Bodies are written verbatim (as decoded from the transfer encoding, never parsed or re-serialized),
+                # the content type only picks the file extension
+                response_file = flow_dir / f"response.{response_extension(content_type)}"
+                with open(response_file, 'wb') as f:
+                    f.write(content)
+
+            elif "capture_stream" in flow.metadata:
+                # Streamed body, already written to disk chunk by chunk as it was forwarded (raw, still content-encoded)
+                response_file = Path(flow.metadata["capture_stream"]["file"])
+            else:
+                response_file = None
+
+            if response_file:
+                # Add the file paths to the metadata
                 capture_data["files"] = {
                     "metadata": str(metadata_file),
                     "response": str(response_file)
                 }
-                if flow.request.content:
+                if request_content:
                     capture_data["files"]["request"] = str(flow_dir / "request.bin")
 
-                # Update metadata file
-                with open(metadata_file, 'w') as f:
-                    json.dump(capture_data, f, indent=2)
+            # Store metadata (once, now that the file paths are known)
+            write_json(metadata_file, capture_data)
 
         except Exception as e:
             print(f"❌ Error storing content for {flow.request.pretty_url}: {e}")
 
+    def log_flow(self, flow: http.HTTPFlow, capture_data: dict, content=None):
+        """Append the flow (metadata plus base64 bodies) to this session's gzipped JSONL log"""
+        try:
+            if self.session_log is None:
+                log_file = self.storage_dir / f"session_{self.session_id}.jsonl.gz"
+                self.session_log = gzip.open(log_file, "ab", compresslevel=1)
+
+            record = dict(capture_data)
+            if content is None:
+                content = flow.response.content
+            request_content = flow.request.content
+            if request_content:
+                record["request_body"] = base64.b64encode(request_content).decode()
+            if content:
+                record["response_body"] = base64.b64encode(content).decode()
+            elif "capture_stream" in flow.metadata:
+                # Streamed bodies were already written to their own file as they were forwarded
+                record["files"] = {"response": flow.metadata["capture_stream"]["file"]}
+
+            line = orjson.dumps(record) if orjson else json.dumps(record).encode()
+            self.session_log.write(line + b"\n")
+
+        except Exception as e:
+            print(f"❌ Error logging flow for {flow.request.pretty_url}: {e}")
+
+    def index_flow(self, capture_data: dict):
+        """Append the flow's line to the capture index"""
+        try:
+            if self.index_file is None:                     # line buffered: readers only ever see whole lines
+                self.index_file = open(self.storage_dir / CAPTURE_INDEX_FILE, 'a', encoding='utf-8', buffering=1)
+            response = capture_data["response"]
+            self.index_file.write(f"{capture_data['timestamp']}\t{response['status_code']}\t"
+                                  f"{int(response['content_modified'])}\t{capture_data['request']['url']}\n")
+        except Exception as e:
+            print(f"❌ Error indexing flow for {capture_data['request']['url']}: {e}")
+
     def get_capture_summary(self):
         """Get a summary of captured content"""
         summary = {
@@ -266,12 +446,17 @@ class LocalMitmproxy:
     Local mitmproxy server implementation
     """
 
-    def __init__(self, port=8080, host="127.0.0.1", storage_dir=None, verbose=True, enable_replacement=True):
+    def __init__(self, port=8080, host="127.0.0.1", storage_dir=None, verbose=True, enable_replacement=True,
+                 on_capture=None, on_ready=None, stream_large_bodies=STREAM_LARGE_BODIES, capture_format="files"):
         self.port = port
         self.host = host
         self.storage_dir = storage_dir
         self.verbose = verbose
         self.enable_replacement = enable_replacement
+        self.on_capture = on_capture
+        self.on_ready = on_ready
+        self.stream_large_bodies = stream_large_bodies
+        self.capture_format = capture_format
         self.master = None
         self.capture_addon = None
         self.running = False
@@ -298,7 +483,10 @@ class LocalMitmproxy:
         self.capture_addon = ContentCaptureAddon(
             storage_dir=self.storage_dir,
             verbose=self.verbose,
-            enable_replacement=self.enable_replacement
+            enable_replacement=self.enable_replacement,
+            on_capture=self.on_capture,
+            on_ready=self.on_running,
+            capture_format=self.capture_format
         )
         addons.append(self.capture_addon)
 
@@ -318,6 +506,8 @@ class LocalMitmproxy:
             # Set up options and master
             opts = self.setup_options()
             self.master = DumpMaster(opts)
+            # stream_large_bodies is defined by the proxyserver addon, so it can only be set once the master exists
+            self.master.options.update(stream_large_bodies=self.stream_large_bodies)
 
             # Add our addons
             addons = self.setup_addons()
@@ -346,6 +536,27 @@ class LocalMitmproxy:
             self.running = False
             print("✅ Mitmproxy server stopped")
 
+    def clear_ssl_cache(self):
+        """Drop the forged host certificates cached by mitmproxy (they are re-generated on the next connection)"""
+        if self.master and self.running:
+            self.master.event_loop.call_soon_threadsafe(self._clear_ssl_cache)
+
+    def on_running(self):
+        """Called (on the proxy's event loop) once mitmproxy is listening, which is when its CertStore exists"""
+        tlsconfig = self.master.addons.get("tlsconfig")
+        if tlsconfig and tlsconfig.certstore:
+            tlsconfig.certstore.STORE_CAP = CERT_CACHE_SIZE          # this proxy's store only, not the CertStore class
+        if self.on_ready:
+            self.on_ready()
+
+    def _clear_ssl_cache(self):
+        tlsconfig = self.master.addons.get("tlsconfig")
+        if tlsconfig and tlsconfig.certstore:
+            cached = len(tlsconfig.certstore.certs)
+            tlsconfig.certstore.certs.clear()
+            tlsconfig.certstore.expire_queue.clear()
+            print(f"🧹 Cleared {cached} cached SSL certificates")
+
     def get_status(self):
         """Get server status"""
         status = {
@@ -369,7 +580,8 @@ class LocalMitmproxy:
             self.capture_addon.reload_replacement_config()
 
 
-def run_mitmproxy_server(port=8080, host="127.0.0.1", storage_dir=None, verbose=True, enable_replacement=True):
+def run_mitmproxy_server(port=8080, host="127.0.0.1", storage_dir=None, verbose=True, enable_replacement=True,
+                         stream_large_bodies=STREAM_LARGE_BODIES, capture_format="files"):
     """
     Run the mitmproxy server in the current thread
     """
@@ -378,7 +590,9 @@ def run_mitmproxy_server(port=8080, host="127.0.0.1", storage_dir=None, verbose=
         host=host,
         storage_dir=storage_dir,
         verbose=verbose,
-        enable_replacement=enable_replacement
+        enable_replacement=enable_replacement,
+        stream_large_bodies=stream_large_bodies,
+        capture_format=capture_format
     )
 
     try:
@@ -401,9 +615,15 @@ def main():
     parser.add_argument("--storage", "-s", type=str, help="Storage directory for captures")
     parser.add_argument("--quiet", "-q", action="store_true", help="Quiet mode (less verbose)")
     parser.add_argument("--no-replace", action="store_true", help="Disable content replacement")
+    parser.add_argument("--stream-large-bodies", type=str, default=STREAM_LARGE_BODIES,
+                        help=f"Stream (and don't replace content in) bodies larger than this (default: {STREAM_LARGE_BODIES})")
+    parser.add_argument("--capture-format", choices=CAPTURE_FORMATS, default="files",
+                        help="files: a directory per flow (default), jsonl: one gzipped JSON line per flow in a session file")
 
     args = parser.parse_args()
 
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO, format="%(message)s")
+
     print("🔧 Local Mitmproxy Server")
     print("=" * 50)
 
@@ -412,7 +632,9 @@ def main():
         host=args.host,
         storage_dir=args.storage,
         verbose=not args.quiet,
-        enable_replacement=not args.no_replace
+        enable_replacement=not args.no_replace,
+        stream_large_bodies=args.stream_large_bodies,
+        capture_format=args.capture_format
     )
 
 
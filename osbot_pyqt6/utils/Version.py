@@ -1,9 +1,10 @@
+import functools
+import importlib.resources
 import osbot_pyqt6
-from osbot_utils.type_safe.Type_Safe import Type_Safe
-from osbot_utils.utils.Files import file_contents, path_combine
+from osbot_utils.utils.Files import path_combine
 
 
-class Version(Type_Safe):
+class Version:
 
     FILE_NAME_VERSION = 'version'
 
@@ -14,7 +15,17 @@ class Version(Type_Safe):
         return path_combine(self.path_code_root(), self.FILE_NAME_VERSION)
 
     def value(self):
-        version = file_contents(self.path_version_file()) or ""
-        return version.strip()
+        return version()
 
-version__osbot_pyqt6 = Version().value()
\ No newline at end of file
+
+@functools.lru_cache(maxsize=1)
+def version() -> str:                                               # read once per process (also works inside the frozen .app)
+    version_file = importlib.resources.files('osbot_pyqt6').joinpath(Version.FILE_NAME_VERSION)
+    if not version_file.is_file():
+        return ""
+    return version_file.read_text().strip()
+
+def __getattr__(name):                                              # version__osbot_pyqt6 is only read when first used, not at import
+    if name == 'version__osbot_pyqt6':
+        return version()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -6,67 +6,82 @@ This sets environment variables and uses multiple methods to ensure SSL bypass w
 
 import os
 import sys
+import html
+import functools
+from typing import ClassVar, Final, Optional
+
+# SSL bypass flags
+# (certificate errors are not ignored globally: BypassWebPage accepts them per request)
+_SSL_FLAGS: Final[frozenset[str]] = frozenset({
+    '--ignore-certificate-errors-spki-list',
+    '--ignore-urlfetcher-cert-requests',
+    '--disable-web-security',
+    '--allow-running-insecure-content',
+    '--disable-features=VizDisplayCompositor',
+    '--disable-extensions',
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu-sandbox',
+    '--ignore-certificate-errors-policy',
+})
+
+# Chromium flags passed through QTWEBENGINE_CHROMIUM_FLAGS (sorted so the value is deterministic, joined once at import)
+_CHROMIUM_FLAGS: Final[tuple[str, ...]] = tuple(sorted(_SSL_FLAGS)) + (
+    '--test-type',                                              # This is key - puts Chromium in test mode
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding',
+    '--disable-field-trial-config',
+    '--disable-ipc-flooding-protection',
+)
+
+# Disable SSL verification at the Chromium level
+_CHROMIUM_ENV: Final[dict[str, str]] = {
+    'QTWEBENGINE_CHROMIUM_FLAGS' : ' '.join(_CHROMIUM_FLAGS),
+    'QTWEBENGINE_DISABLE_SANDBOX': '1',
+    'QTWEBENGINE_REMOTE_DEBUGGING': '9222'
+}
 
 
 # Set environment variables BEFORE any Qt imports
 # These affect Chromium's behavior at the lowest level
 def setup_chromium_environment():
     """Set environment variables that affect Chromium/QtWebEngine SSL behavior"""
+    os.environ.update(_CHROMIUM_ENV)
 
-    # Disable SSL verification at the Chromium level
-    chromium_env_vars = {
-        'QTWEBENGINE_CHROMIUM_FLAGS': (
-            '--ignore-certificate-errors '
-            '--ignore-ssl-errors '
-            '--ignore-certificate-errors-spki-list '
-            '--ignore-urlfetcher-cert-requests '
-            '--disable-web-security '
-            '--allow-running-insecure-content '
-            '--disable-features=VizDisplayCompositor '
-            '--disable-extensions '
-            '--no-sandbox '
-            '--disable-dev-shm-usage '
-            '--disable-gpu-sandbox '
-            '--ignore-certificate-errors-policy '
-            '--allow-running-insecure-content '
-            '--disable-background-timer-throttling '
-            '--disable-backgrounding-occluded-windows '
-            '--disable-renderer-backgrounding '
-            '--disable-field-trial-config '
-            '--disable-ipc-flooding-protection'
-        ),
-        'QTWEBENGINE_DISABLE_SANDBOX': '1',
-        'QTWEBENGINE_REMOTE_DEBUGGING': '9222'
-    }
-
-    print("🔧 Setting Chromium environment variables...")
-    for key, value in chromium_env_vars.items():
-        os.environ[key] = value
-        print(f"   {key}={value}")
-
-    return chromium_env_vars
+    if os.environ.get("WEBCAPTURE_DEBUG"):
+        print("🔧 Setting Chromium environment variables...")
+        for key, value in _CHROMIUM_ENV.items():
+            print(f"   {key}={value}")
+
+    return _CHROMIUM_ENV
 
 
 # Apply environment setup IMMEDIATELY
 setup_chromium_environment()
 
 import signal
-import subprocess
-import time
-import threading
-import argparse
 import atexit
-import requests
-import tempfile
+import logging
 from pathlib import Path
 
 from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QToolBar, QLineEdit, QPushButton, \
     QStatusBar, QMessageBox
-from PyQt6.QtCore import QUrl, Qt, QProcess, pyqtSlot, QTimer
-from PyQt6.QtGui import QIcon, QAction
+from PyQt6.QtCore import QUrl, QProcess, pyqtSlot, QTimer, QObject, pyqtSignal, QCommandLineParser, QCommandLineOption
+from PyQt6.QtGui import QAction
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 from PyQt6.QtWebEngineCore import QWebEngineProfile, QWebEnginePage, QWebEngineSettings
-from PyQt6.QtNetwork import QNetworkProxy, QSslCertificate, QSslConfiguration
+from PyQt6.QtNetwork import QNetworkProxy, QSslConfiguration, QNetworkAccessManager, QNetworkRequest, \
+    QNetworkReply, QSslSocket, QTcpSocket, QSslCertificate
+
+logger = logging.getLogger(__name__)
+
+# FastAPI server started next to the app when running from source (the frozen app runs it via --server-mode instead)
+SERVER_SCRIPT = Path(__file__).resolve().parent.parent / "server.py"
+
+# Longest partial line of FastAPI output left buffered in QProcess while waiting for its newline, before it is
+# logged as it is (keeps a server that writes without newlines from growing the buffer without bound)
+SERVER_OUTPUT_LINE_LIMIT = 64 * 1024
 
 
 class AggressiveSSLBypass:
@@ -74,34 +89,6 @@ class AggressiveSSLBypass:
     Multiple approaches to bypass SSL certificate validation
     """
 
-    @staticmethod
-    def setup_application_arguments():
-        """Set up command line arguments for QApplication"""
-        ssl_args = [
-            '--ignore-certificate-errors',
-            '--ignore-ssl-errors',
-            '--ignore-certificate-errors-spki-list',
-            '--ignore-urlfetcher-cert-requests',
-            '--disable-web-security',
-            '--allow-running-insecure-content',
-            '--disable-features=VizDisplayCompositor',
-            '--no-sandbox',
-            '--disable-dev-shm-usage',
-            '--disable-gpu-sandbox',
-            '--ignore-certificate-errors-policy',
-            '--disable-extensions',
-            '--allow-running-insecure-content',
-            '--test-type'  # This is key - puts Chromium in test mode
-        ]
-
-        print("🔧 Adding SSL bypass arguments to sys.argv...")
-        for arg in ssl_args:
-            if arg not in sys.argv:
-                sys.argv.append(arg)
-
-        print(f"✅ Added {len(ssl_args)} SSL bypass arguments")
-        return ssl_args
-
     @staticmethod
     def configure_web_profile(profile: QWebEngineProfile):
         """Configure web profile with aggressive SSL bypass settings"""
@@ -127,57 +114,146 @@ class AggressiveSSLBypass:
         return profile
 
 
-class CertificateHandler:
-    """Enhanced certificate handler with multiple approaches"""
+class CertificateHandler(QObject):
+    """Enhanced certificate handler with multiple approaches (downloads via Qt's event loop, never blocking the UI)"""
+
+    certReady = pyqtSignal(bool)                                # emitted once a download finished: True when the cert was saved
 
-    def __init__(self, proxy_host="localhost", proxy_port=8080):
+    MAX_RETRIES    = 3
+    RETRY_DELAY_MS = 2000
+    TIMEOUT_MS     = 15000
+
+    def __init__(self, proxy_host="localhost", proxy_port=8080, parent=None):
+        super().__init__(parent)
         self.proxy_host = proxy_host
         self.proxy_port = proxy_port
         self.cert_dir = Path.home() / ".mitmproxy"
         self.cert_file = self.cert_dir / "mitmproxy-ca-cert.pem"
+        self.attempt = 0
+        self.download_file = None
+        self.network_manager = None                             # only created when a download is actually needed
 
     def get_mitmproxy_cert_url(self):
         return f"http://{self.proxy_host}:{self.proxy_port}/cert/pem"
 
+    @functools.cached_property
+    def cert_present(self):
+        """True when a non-empty certificate file exists (checked once, re-checked after a download)"""
+        return self.cert_file.is_file() and self.cert_file.stat().st_size > 0
+
+    def get_network_manager(self):
+        if self.network_manager is None:
+            self.network_manager = QNetworkAccessManager(self)
+            self.network_manager.setProxy(QNetworkProxy(QNetworkProxy.ProxyType.HttpProxy, self.proxy_host, self.proxy_port))
+
+            # Peer verification is off for this download, so there is no point in loading the system CA store
+            self.ssl_configuration = QSslConfiguration.defaultConfiguration()
+            self.ssl_configuration.setPeerVerifyMode(QSslSocket.PeerVerifyMode.VerifyNone)
+            self.ssl_configuration.setCaCertificates([])
+        return self.network_manager
+
     def download_certificate(self):
-        """Download certificate with retry logic"""
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                print(f"📥 Downloading certificate (attempt {attempt + 1}/{max_retries})...")
-
-                proxies = {
-                    'http': f'http://{self.proxy_host}:{self.proxy_port}',
-                    'https': f'http://{self.proxy_host}:{self.proxy_port}'
-                }
-
-                response = requests.get(
-                    self.get_mitmproxy_cert_url(),
-                    proxies=proxies,
-                    timeout=15,
-                    verify=False
-                )
-                response.raise_for_status()
-
-                self.cert_dir.mkdir(parents=True, exist_ok=True)
-
-                with open(self.cert_file, 'wb') as f:
-                    f.write(response.content)
+        """Start downloading the certificate with retry logic (returns immediately, the outcome comes via certReady)"""
+        if self.cert_present:
+            self.certReady.emit(True)
+            return
+        self.attempt = 0
+        self.request_certificate()
+
+    def request_certificate(self):
+        import tempfile                                         # only needed when the certificate isn't there yet
+
+        self.attempt += 1
+        print(f"📥 Downloading certificate (attempt {self.attempt}/{self.MAX_RETRIES})...")
+
+        network_manager = self.get_network_manager()
+        request = QNetworkRequest(QUrl(self.get_mitmproxy_cert_url()))
+        request.setTransferTimeout(self.TIMEOUT_MS)
+        request.setSslConfiguration(self.ssl_configuration)
+
+        # The body is streamed into a temp file next to the cert, which is only moved into place once complete
+        self.cert_dir.mkdir(parents=True, exist_ok=True)
+        self.download_file = tempfile.NamedTemporaryFile(dir=self.cert_dir, prefix=".cert-", suffix=".tmp", delete=False)
+
+        reply = network_manager.get(request)
+        reply.readyRead.connect(lambda: self.download_file.write(reply.readAll().data()))
+        reply.finished.connect(lambda: self.on_certificate_reply(reply))
+
+    def on_certificate_reply(self, reply):
+        download_file, self.download_file = self.download_file, None
+        try:
+            if reply.error() == QNetworkReply.NetworkError.NoError:
+                download_file.write(reply.readAll().data())
+                download_file.close()
+                os.replace(download_file.name, self.cert_file)
+                self.__dict__.pop('cert_present', None)
 
                 print(f"✅ Certificate downloaded: {self.cert_file}")
-                return True
-
-            except Exception as e:
-                print(f"❌ Attempt {attempt + 1} failed: {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(2)  # Wait before retry
+                self.certReady.emit(True)
+                return
+            print(f"❌ Attempt {self.attempt} failed: {reply.errorString()}")
+        except OSError as e:
+            print(f"❌ Attempt {self.attempt} failed: {e}")
+        finally:
+            reply.deleteLater()
+            download_file.close()
+            if os.path.exists(download_file.name):              # left over from a failed attempt
+                os.remove(download_file.name)
+
+        if self.attempt < self.MAX_RETRIES:
+            QTimer.singleShot(self.RETRY_DELAY_MS, self.request_certificate)        # Wait before retry
+        else:
+            self.certReady.emit(False)
+
+
+class BypassWebPage(QWebEnginePage):
+    """Page that accepts certificate errors only for local hosts and for certificate chains from the mitmproxy CA"""
+
+    ALLOWED_HOSTS     = frozenset({"localhost", "127.0.0.1", "::1"})
+    MITMPROXY_CA_FILE = Path.home() / ".mitmproxy" / "mitmproxy-ca-cert.pem"
+
+    def __init__(self, profile, parent=None):
+        super().__init__(profile, parent)
+        self.mitmproxy_ca = None
+        self.certificateError.connect(self.on_certificate_error)
+
+    def get_mitmproxy_ca(self):
+        """The mitmproxy CA certificate (loaded on first use, mitmproxy creates it when it first starts)"""
+        if self.mitmproxy_ca is None and self.MITMPROXY_CA_FILE.is_file():
+            certificates = QSslCertificate.fromPath(str(self.MITMPROXY_CA_FILE))
+            if certificates:
+                self.mitmproxy_ca = certificates[0]
+        return self.mitmproxy_ca
+
+    def on_certificate_error(self, error):
+        host = error.url().host()
+        if not error.isOverridable():
+            # Chromium never lets HSTS (and HSTS-preloaded) hosts be overridden, whoever issued the certificate
+            print(f"❌ Certificate error for {host} can't be overridden (HSTS): "
+                  f"trust the mitmproxy CA ({self.MITMPROXY_CA_FILE}) in the system certificate store")
+            error.rejectCertificate()
+            QTimer.singleShot(0, lambda: self.show_hsts_error(host))
+            return
+        mitmproxy_ca = self.get_mitmproxy_ca()
+        if host in self.ALLOWED_HOSTS or (mitmproxy_ca and mitmproxy_ca in error.certificateChain()):
+            error.acceptCertificate()
+        else:
+            print(f"❌ Certificate error for {host}: {error.description()}")
+            error.rejectCertificate()
 
-        return False
+    def show_hsts_error(self, host):
+        """Explain a certificate error Chromium doesn't allow to be overridden, instead of its generic error page"""
+        self.setHtml(f"""<h2>❌ Certificate error for {html.escape(host)}</h2>
+<p>This site uses HSTS, so Chromium does not allow its certificate errors to be overridden.</p>
+<p>To browse it through the proxy, add the mitmproxy CA certificate <code>{html.escape(str(self.MITMPROXY_CA_FILE))}</code>
+to the system's trusted certificates (see the README's Troubleshooting section).</p>""")
 
 
 class SuperBypassWebView(QWebEngineView):
     """WebView with maximum SSL bypass configuration"""
 
+    _profile: ClassVar[Optional[QWebEngineProfile]] = None       # shared by all views (one Chromium request context, cookie jar and cache)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setup_bypass_profile()
@@ -187,14 +263,18 @@ class SuperBypassWebView(QWebEngineView):
         try:
             print("🚀 Setting up super bypass web profile...")
 
-            # Create a custom profile
-            self.bypass_profile = QWebEngineProfile("SuperBypass", self)
+            # Create the custom off-the-record profile (no storage name: nothing is written to disk) on first use
+            if SuperBypassWebView._profile is None:
+                profile = QWebEngineProfile(QApplication.instance())
+                profile.setPersistentCookiesPolicy(QWebEngineProfile.PersistentCookiesPolicy.NoPersistentCookies)
 
-            # Apply aggressive SSL bypass configuration
-            AggressiveSSLBypass.configure_web_profile(self.bypass_profile)
+                # Apply aggressive SSL bypass configuration
+                AggressiveSSLBypass.configure_web_profile(profile)
+                SuperBypassWebView._profile = profile
+            self.bypass_profile = SuperBypassWebView._profile
 
             # Create page with bypass profile
-            self.bypass_page = QWebEnginePage(self.bypass_profile, self)
+            self.bypass_page = BypassWebPage(self.bypass_profile, self)
             self.setPage(self.bypass_page)
 
             print("✅ Super bypass web view initialized")
@@ -208,6 +288,12 @@ class SuperBypassWebView(QWebEngineView):
 
 
 class WebCaptureBrowser(QMainWindow):
+
+    readyToLoad = pyqtSignal()                                  # emitted once mitmproxy accepts connections
+
+    PROXY_PROBE_INTERVAL_MS  = 250
+    PROXY_PROBE_MAX_ATTEMPTS = 40                               # after ~10s the page is loaded anyway
+
     def __init__(self, api_port=8000, debug_port=9222, proxy_port=8080):
         super().__init__()
 
@@ -218,6 +304,7 @@ class WebCaptureBrowser(QMainWindow):
         self.current_url = "https://www.google.com"
         self.fastapi_process = None
         self.cert_handler = None
+        self.proxy_probe_attempts = 0
 
         # Set window properties
         self.setWindowTitle("Web Content Capture (SSL Bypass)")
@@ -234,9 +321,11 @@ class WebCaptureBrowser(QMainWindow):
         self.status_bar = QStatusBar()
         self.setStatusBar(self.status_bar)
 
-        # Start services
+        # Start services (the proxy is configured and the first page loaded as soon as mitmproxy is reachable)
         self.start_fastapi_server()
-        QTimer.singleShot(2000, self.setup_proxy_configuration)
+        self.readyToLoad.connect(self.setup_proxy_configuration)
+        self.readyToLoad.connect(self.load_initial_url)
+        QTimer.singleShot(0, self.probe_proxy)
 
         atexit.register(self.cleanup)
 
@@ -290,8 +379,23 @@ class WebCaptureBrowser(QMainWindow):
 
         self.layout.addWidget(self.web_view)
 
-        # Initial URL loading
-        QTimer.singleShot(4000, self.load_initial_url)
+    def probe_proxy(self):
+        """Try a TCP connection to mitmproxy, readyToLoad is emitted once it succeeds"""
+        self.proxy_probe_attempts += 1
+        socket = QTcpSocket(self)
+        socket.connected.connect(lambda: self.on_proxy_probe(socket, True))
+        socket.errorOccurred.connect(lambda error: self.on_proxy_probe(socket, False))
+        socket.connectToHost("localhost", self.proxy_port)
+
+    def on_proxy_probe(self, socket, connected):
+        socket.blockSignals(True)
+        socket.abort()
+        socket.deleteLater()
+
+        if connected or self.proxy_probe_attempts >= self.PROXY_PROBE_MAX_ATTEMPTS:
+            self.readyToLoad.emit()
+        else:
+            QTimer.singleShot(self.PROXY_PROBE_INTERVAL_MS, self.probe_proxy)
 
     def setup_proxy_configuration(self):
         """Set up proxy with enhanced error handling"""
@@ -308,10 +412,11 @@ class WebCaptureBrowser(QMainWindow):
             self.status_bar.showMessage(f"Proxy active: localhost:{self.proxy_port}")
 
             # Set up certificate handler
-            self.cert_handler = CertificateHandler("localhost", self.proxy_port)
+            self.cert_handler = CertificateHandler("localhost", self.proxy_port, self)
+            self.cert_handler.certReady.connect(self.on_certificate_ready)
 
             # Download certificate if needed
-            if not self.cert_handler.cert_file.exists():
+            if not self.cert_handler.cert_present:
                 QTimer.singleShot(1000, self.download_certificate)
 
         except Exception as e:
@@ -322,16 +427,19 @@ class WebCaptureBrowser(QMainWindow):
         """Download certificate with user feedback"""
         try:
             self.status_bar.showMessage("Downloading mitmproxy certificate...")
-            success = self.cert_handler.download_certificate()
-
-            if success:
-                self.status_bar.showMessage("✅ Certificate downloaded")
-            else:
-                self.status_bar.showMessage("⚠️ Certificate download failed")
+            self.cert_handler.download_certificate()
 
         except Exception as e:
             print(f"❌ Certificate download error: {e}")
 
+    @pyqtSlot(bool)
+    def on_certificate_ready(self, success):
+        """Show the outcome of the certificate download"""
+        if success:
+            self.status_bar.showMessage("✅ Certificate downloaded")
+        else:
+            self.status_bar.showMessage("⚠️ Certificate download failed")
+
     def show_ssl_status(self):
         """Show detailed SSL bypass status"""
         status_text = f"""SSL Bypass Configuration:
@@ -340,12 +448,14 @@ class WebCaptureBrowser(QMainWindow):
    QTWEBENGINE_CHROMIUM_FLAGS with SSL bypass options
    QTWEBENGINE_DISABLE_SANDBOX=1
 
-🔧 Command Line Arguments: APPLIED
-   --ignore-certificate-errors
-   --ignore-ssl-errors
+🔧 Chromium Flags: APPLIED (via QTWEBENGINE_CHROMIUM_FLAGS)
    --disable-web-security
    --test-type (Chromium test mode)
-   + 10 additional SSL bypass flags
+   + {len(_CHROMIUM_FLAGS) - 2} additional flags
+
+🔧 Certificate Errors: ACCEPTED SELECTIVELY
+   localhost and certificates issued by the mitmproxy CA
+   (HSTS sites need the mitmproxy CA trusted by the system)
 
 🔧 Profile Configuration: ACTIVE
    Custom QWebEngineProfile with permissive settings
@@ -379,7 +489,7 @@ Download URL: {self.cert_handler.get_mitmproxy_cert_url()}
 
 SSL Bypass: Multiple layers active
 - Environment variables
-- Command line flags  
+- Chromium flags
 - Profile configuration"""
         else:
             status_text = "Proxy not configured"
@@ -418,33 +528,32 @@ SSL Bypass: Multiple layers active
     def start_fastapi_server(self):
         """Start FastAPI server"""
         try:
-            server_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py")
-            python_executable = sys.executable
-
+            # The server always runs in its own process: the frozen app (main_app) starts itself in --server-mode
             if getattr(sys, 'frozen', False):
-                def run_server():
-                    import server
-                    import uvicorn
-                    uvicorn.run(server.app, host="127.0.0.1", port=self.api_port)
-
-                server_thread = threading.Thread(target=run_server)
-                server_thread.daemon = True
-                server_thread.start()
+                arguments = ['--server-mode', '--port', str(self.api_port)]
             else:
-                cmd = [python_executable, server_path, '--port', str(self.api_port)]
-                self.fastapi_process = QProcess()
-                self.fastapi_process.setProcessChannelMode(QProcess.ProcessChannelMode.MergedChannels)
-                self.fastapi_process.readyReadStandardOutput.connect(self.handle_server_output)
-                self.fastapi_process.start(python_executable, cmd[1:])
+                arguments = [str(SERVER_SCRIPT), '--port', str(self.api_port)]
+
+            self.fastapi_process = QProcess()
+            self.fastapi_process.setProcessChannelMode(QProcess.ProcessChannelMode.MergedChannels)
+            self.fastapi_process.readyReadStandardOutput.connect(self.handle_server_output)
+            self.fastapi_process.start(sys.executable, arguments)
 
         except Exception as e:
             print(f"❌ FastAPI server error: {e}")
 
     def handle_server_output(self):
-        """Handle FastAPI server output"""
+        """Handle FastAPI server output (complete lines only, a partial line stays buffered in QProcess)"""
         if self.fastapi_process:
-            data = self.fastapi_process.readAllStandardOutput().data().decode()
-            print(f"FastAPI: {data.strip()}")
+            debug = logger.isEnabledFor(logging.DEBUG)
+            while self.fastapi_process.canReadLine():               # always read (to drain the pipe), only log at DEBUG
+                line = self.fastapi_process.readLine().data()
+                if debug:
+                    logger.debug("FastAPI: %s", line.decode('utf-8', errors='replace').rstrip())
+            if self.fastapi_process.bytesAvailable() > SERVER_OUTPUT_LINE_LIMIT:
+                line = self.fastapi_process.readAll().data()
+                if debug:
+                    logger.debug("FastAPI: %s", line.decode('utf-8', errors='replace').rstrip())
 
     def cleanup(self):
         """Cleanup on exit"""
@@ -456,27 +565,33 @@ SSL Bypass: Multiple layers active
 
 
 def main():
-    # Parse arguments first
-    parser = argparse.ArgumentParser(description="Web Content Capture with Aggressive SSL Bypass")
-    parser.add_argument('--api-port', type=int, default=8000, help='FastAPI port')
-    parser.add_argument('--debug-port', type=int, default=9222, help='Debug port')
-    parser.add_argument('--proxy-port', type=int, default=8080, help='mitmproxy port')
-
-    args, unknown = parser.parse_known_args()
-
-    # Apply SSL bypass arguments
-    AggressiveSSLBypass.setup_application_arguments()
-
     signal.signal(signal.SIGINT, signal.SIG_DFL)
 
-    # Create application
-    app = QApplication(sys.argv)
+    # Create application (Chromium reads its flags from QTWEBENGINE_CHROMIUM_FLAGS, Qt doesn't need to see any arguments)
+    app = QApplication([sys.argv[0]])
     app.setApplicationName("Web Content Capture")
     app.setOrganizationName("Web Content Capture")
 
+    # Parse arguments (unknown ones are ignored)
+    parser = QCommandLineParser()
+    parser.setApplicationDescription("Web Content Capture with Aggressive SSL Bypass")
+    help_option       = parser.addHelpOption()
+    api_port_option   = QCommandLineOption("api-port"  , "FastAPI port" , "port", "8000")
+    debug_port_option = QCommandLineOption("debug-port", "Debug port"   , "port", "9222")
+    proxy_port_option = QCommandLineOption("proxy-port", "mitmproxy port", "port", "8080")
+    verbose_option    = QCommandLineOption("verbose"   , "Log FastAPI output")
+    parser.addOptions([api_port_option, debug_port_option, proxy_port_option, verbose_option])
+    parser.parse(sys.argv)
+    if parser.isSet(help_option):
+        parser.showHelp()
+
+    logging.basicConfig(level=logging.DEBUG if parser.isSet(verbose_option) else logging.INFO, format="%(message)s")
+
     print("🚀 Starting Web Content Capture with AGGRESSIVE SSL bypass...")
 
-    browser = WebCaptureBrowser(api_port=args.api_port, debug_port=args.debug_port, proxy_port=args.proxy_port)
+    browser = WebCaptureBrowser(api_port   = int(parser.value(api_port_option  )),
+                                debug_port = int(parser.value(debug_port_option)),
+                                proxy_port = int(parser.value(proxy_port_option)))
     browser.show()
 
     sys.exit(app.exec())
@@ -0,0 +1,16 @@
+# PyInstaller hook for osbot_pyqt6 (picked up via hookspath in WebContentCapture.spec)
+from PyInstaller.utils.hooks import collect_submodules, collect_data_files
+
+# build_macos is the build script itself and must not be bundled into the app
+hiddenimports  = collect_submodules('osbot_pyqt6', filter=lambda name: name != 'osbot_pyqt6.build_macos')
+
+# uvicorn resolves these from strings in its Config, so static analysis cannot see them
+hiddenimports += ['uvicorn.logging'              ,
+                  'uvicorn.loops.auto'           ,
+                  'uvicorn.protocols.http.auto'  ,
+                  'uvicorn.lifespan.on'          ]
+
+# the package's sources and the version / json files are shipped as data as well (found in one walk of the package)
+# server.py is not: it is bundled as a module, and the frozen app runs it via main_app --server-mode
+datas          = collect_data_files('osbot_pyqt6', include_py_files=True,
+                                    includes=['**/*.py', 'version', '**/*.json'], excludes=['build_macos.py', 'server.py'])
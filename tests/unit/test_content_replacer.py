@@ -0,0 +1,222 @@
+import os
+import re
+import json
+import tempfile
+from datetime                         import date
+from unittest                         import TestCase
+from osbot_pyqt6.content_replacer     import ContentReplacer, literal_text, compile_pattern, required_literal, inject_after_body
+
+
+class test_ContentReplacer(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.replacer = ContentReplacer(data_dir=self.temp_dir.name)
+        self.replacer.replacements = []
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_default_config(self):
+        replacer = ContentReplacer(data_dir=self.temp_dir.name)
+        assert len(replacer.replacements) == 3
+        for replacement in replacer.replacements:
+            assert replacement["_compiled"] is not None
+
+    def test_process_content(self):
+        self.replacer.add_replacement("urls", r"https://example\.com", "https://modified-example.com")
+        content = b'<a href="https://example.com">link</a>'
+        assert self.replacer.process_content(content, "text/html"      ) == b'<a href="https://modified-example.com">link</a>'
+        assert self.replacer.process_content(content, "image/png"      ) is content
+        assert self.replacer.process_content(content, "application/json") is content     # rule only targets text/html
+        assert self.replacer.stats["total_replaced"] == 1
+        assert self.replacer.stats["last_updated"]   is None                             # only formatted when the stats are read
+        assert self.replacer.get_stats()["last_updated"].startswith(str(date.today()))
+
+    def test_compile_pattern(self):
+        assert compile_pattern(r"\bGoogle\b", re.IGNORECASE) is compile_pattern(r"\bGoogle\b", re.IGNORECASE)
+        assert compile_pattern(r"\bGoogle\b"               ) is not compile_pattern(r"\bGoogle\b", re.IGNORECASE)
+
+    def test_reload_config(self):
+        replacer = ContentReplacer(data_dir=self.temp_dir.name)
+        compiled = [replacement["_compiled"] for replacement in replacer.replacements]
+        replacer.reload_config()
+        for replacement, previous in zip(replacer.replacements, compiled):
+            assert replacement["_compiled"] is previous                             # served from the compile cache
+
+    def test_content_types(self):
+        self.replacer.add_replacement("html", "a", "b", content_types=["Text/HTML"])
+        self.replacer.add_replacement("any" , "c", "d")
+        self.replacer.replacements[1]["content_types"] = []                            # add_replacement defaults to text/html
+        self.replacer.compile_replacements()
+        assert self.replacer.should_process_content("text/html; charset=utf-8") is True
+        assert self.replacer.should_process_content("image/svg+xml"           ) is False
+        assert self.replacer.should_process_content(None                      ) is False
+        assert [r["name"] for r in self.replacer.get_applicable_replacements("text/html; charset=UTF-8")] == ["html", "any"]
+        assert [r["name"] for r in self.replacer.get_applicable_replacements("text/css"                )] == ["any"]
+        self.replacer.enable_replacement("html", False)
+        assert [r["name"] for r in self.replacer.get_applicable_replacements("text/html"               )] == ["any"]
+
+    def test_literal_text(self):
+        assert literal_text(r"https://example\.com") == "https://example.com"
+        assert literal_text("plain text"           ) == "plain text"
+        assert literal_text(r"\bGoogle\b"          ) is None
+        assert literal_text(r"(<body[^>]*>)"       ) is None
+        assert literal_text("trailing\\"          ) is None
+
+    def test_literal_replacement(self):
+        self.replacer.add_replacement("literal" , r"a.b\.c", "X")
+        self.replacer.add_replacement("backrefs", r"x\+y"  , r"[\g<0>]")
+        literal, backrefs = self.replacer.replacements
+        assert literal ["_literal"] is None                                          # '.' is a regex wildcard
+        assert backrefs["_literal"] is None                                          # replacement uses a template
+        self.replacer.add_replacement("url", r"example\.com", "example.org")
+        assert self.replacer.replacements[2]["_literal"] == "example.com"
+        assert self.replacer.process_content(b"a-b.c x+y example.com", "text/html") == b"X [x+y] example.org"
+
+    def test_fused_literals(self):
+        self.replacer.add_replacement("lt"    , "<"          , "[")
+        self.replacer.add_replacement("gt"    , ">"          , "]")
+        self.replacer.add_replacement("http"  , "http://"    , "https://")
+        self.replacer.add_replacement("domain", r"site\.com" , "example.org")
+        self.replacer.add_replacement("chain" , "example"    , "demo")                # overlaps 'domain' output, so applied after it
+        plan = self.replacer.replacement_plan(self.replacer.replacements)
+        assert [name for name, _ in plan] == ["lt, gt", "http, domain", "chain"]
+        assert self.replacer.replacement_plan(self.replacer.replacements) is plan
+        assert self.replacer.process_content(b"<b> http://site.com", "text/html") == b"[b] https://demo.org"
+
+    def test_binary(self):
+        self.replacer.add_replacement("url", r"example\.com", "example.org")
+        latin_1 = "café example.com".encode("latin-1")                              # not valid utf-8
+        assert self.replacer.use_binary(self.replacer.rule_sets["text/html"], latin_1) is True
+        assert self.replacer.process_content(latin_1, "text/html") == "café example.org".encode("latin-1")
+
+        self.replacer.add_replacement("word", r"caf.", "bar")
+        assert self.replacer.use_binary(self.replacer.rule_sets["text/html"], b"cafe"               ) is True
+        assert self.replacer.use_binary(self.replacer.rule_sets["text/html"], "café".encode("utf-8")) is False     # '.' must see 'é' as one char
+        assert self.replacer.process_content("café example.com".encode("utf-8"), "text/html") == b"bar example.org"
+
+    def test_required_literal(self):
+        assert required_literal(r"https://example\.com"           ) == "https://example.com"
+        assert required_literal(r"\bGoogle\b"                     ) == "Google"
+        assert required_literal(r"colou?r"                        ) == "colo"
+        assert required_literal(r"<div class=\"ad\">.*?</div>"    ) == '<div class="ad">'
+        assert required_literal(r"\bGoogle\b", re.IGNORECASE      ) is None
+        assert required_literal(r"(<body[^>]*>)"                  ) is None
+        assert required_literal(r"http|ftp"                       ) is None
+        assert required_literal(r"\x41"                           ) is None                   # escapes are skipped whole
+        assert required_literal(r"ab\x41cd"                       ) == "ab"
+        assert required_literal(r"ab\101cd"                       ) == "ab"
+        assert required_literal(r"(a)\1xyz"                       ) == "xyz"
+        assert required_literal(r"\N{LATIN CAPITAL LETTER A}bc"   ) == "bc"
+        assert required_literal(r"\u00e9t\U0001F600"              ) == "t"
+
+    def test_prefilter__escapes(self):
+        self.replacer.add_replacement("hex", r"\x41", "Z")
+        assert self.replacer.process_content(b"A", "text/html") == b"Z"
+
+    def test_prefilter(self):
+        self.replacer.add_replacement("ads", r"<div class=\"ad\">.*?</div>", "")
+        assert self.replacer.may_match(self.replacer.rule_sets["text/html"], b"<p>no ads here</p>"               ) is False
+        assert self.replacer.may_match(self.replacer.rule_sets["text/html"], b'<div class="ad">buy</div><p>x</p>') is True
+        assert self.replacer.process_content(b'<div class="ad">buy</div><p>x</p>', "text/html") == b"<p>x</p>"
+
+    def test_single_pass(self):
+        replacer = ContentReplacer(data_dir=self.temp_dir.name, single_pass=True)
+        replacer.replacements = []
+        replacer.add_replacement("google", r"\bGoogle\b"   , "MODIFIED"           , flags=["IGNORECASE"])
+        replacer.add_replacement("banner", r"(<body[^>]*>)", r"\1<div>banner</div>", flags=["IGNORECASE"])
+        replacer.add_replacement("url"   , r"(https?)://example\.com", r"\1://example.org")
+        plan = replacer.replacement_plan(replacer.replacements)
+        assert [name for name, _ in plan] == ["google, banner, url"]
+        content = b'<BODY class="x"><h1>google</h1><a href="http://example.com">Google</a></BODY>'
+        assert replacer.process_content(content, "text/html") == (b'<BODY class="x"><div>banner</div><h1>MODIFIED</h1>'
+                                                                   b'<a href="http://example.org">MODIFIED</a></BODY>')
+
+        replacer.add_replacement("repeat", r"(a)\1", "b")                                   # numbered backreference: can't be fused
+        assert len(replacer.replacement_plan(replacer.replacements)) == 4
+
+    def test_stream_processor(self):
+        self.replacer.add_replacement("url", r"https://example\.com", "https://example.org")
+        body    = b"<a href='https://example.com'>link</a>" * 1000
+        matches = [0]
+        process = self.replacer.stream_processor("text/html", matches)
+        chunks  = [body[i:i + 7] for i in range(0, len(body), 7)]                      # matches split across chunks
+        output  = b"".join(process(chunk) for chunk in chunks) + process(b"")
+        assert output     == body.replace(b"example.com", b"example.org")
+        assert matches[0] == 1000
+
+        assert self.replacer.stream_processor("image/png", [0]) is None
+        self.replacer.add_replacement("word", r"\bexample\b", "demo")                   # not a literal: needs the whole body
+        assert self.replacer.stream_processor("text/html", [0]) is None
+
+    def test_inject_after_body(self):
+        assert inject_after_body('<html><BODY class="x">hi</BODY>', "[banner]"       ) == ('<html><BODY class="x">[banner]hi</BODY>', 1)
+        assert inject_after_body(b"<body>a</body><body>b"         , b"[banner]"      ) == (b"<body>[banner]a</body><body>[banner]b", 2)
+        assert inject_after_body("<BODY>"                         , "[banner]", False) == ("<BODY>", 0)
+        assert inject_after_body("<body class='unclosed"          , "[banner]"       ) == ("<body class='unclosed", 0)
+
+        replacer = ContentReplacer(data_dir=self.temp_dir.name)
+        banner   = replacer.replacements[1]
+        assert banner["_inject"].startswith('<div style="background: red;')
+        replacer.enable_replacement(banner["name"])
+        assert replacer.process_content(b"<Body>hello", "text/html") == ("<Body>" + banner["_inject"] + "hello").encode()
+
+    def test_ignorecase_literal(self):
+        self.replacer.add_replacement("brand", "acme corp", "ACME Inc.", flags=["IGNORECASE"])
+        assert self.replacer.replacements[0]["_literal_ci"] == "acme corp"
+        assert self.replacer.process_content(b"Acme Corp and ACME CORP"      , "text/html") == b"ACME Inc. and ACME Inc."
+        assert self.replacer.process_content("Acme Corp café".encode("utf-8"), "text/html") == "ACME Inc. café".encode("utf-8")   # non-ASCII body: regex
+
+    def test_invalid_pattern(self):
+        self.replacer.add_replacement("broken", r"(unclosed", "x")
+        broken = self.replacer.replacements[0]
+        assert broken["_compiled"] is None
+        assert broken["enabled"]   is True                                            # kept, so the fixed pattern applies again
+        assert broken["_error"].startswith("missing ), unterminated subpattern")
+        assert self.replacer.process_content(b"(unclosed", "text/html") == b"(unclosed"
+        assert self.replacer.get_applicable_replacements("text/html") == []
+        assert self.replacer.enable_replacement("broken") is False
+        with open(self.replacer.config_file, encoding='utf-8') as f:
+            assert json.load(f)["replacements"][0]["enabled"] is True
+
+        self.replacer.add_replacement("bad template", r"(a)b", r"\2")                  # would only fail at sub time
+        assert self.replacer.replacements[1]["_compiled"] is None
+        assert self.replacer.replacements[1]["_error"]  == "invalid group reference 2 at position 1"
+
+    def test_process_content__failing_step(self):
+        self.replacer.add_replacement("url", r"example\.com", "example.org")
+        def fail(text):
+            raise RuntimeError("boom")
+        rule_set = self.replacer.rule_sets["text/html"]
+        self.replacer.rule_sets["text/html"] = rule_set._replace(plan        = [("fail", fail)] + rule_set.plan,
+                                                                 binary_plan = [("fail", fail)] + rule_set.binary_plan)
+        assert self.replacer.process_content(b"example.com", "text/html") == b"example.org"
+
+    def test_load_config__invalid_rules(self):
+        rules = [{"name": "locale"        , "pattern": "a", "replacement": "b", "flags": ["LOCALE"]},   # ValueError on a str pattern
+                 {"name": "no replacement", "pattern": "a"                                        },   # KeyError
+                 {"name": "valid"         , "pattern": "a", "replacement": "b"                    }]
+        with open(self.replacer.config_file, 'w', encoding='utf-8') as f:
+            json.dump({"replacements": rules}, f)
+
+        replacer = ContentReplacer(data_dir=self.temp_dir.name)
+        assert [replacement["name"   ] for replacement in replacer.replacements] == ["locale", "no replacement", "valid"]
+        assert [replacement["_compiled"] is not None for replacement in replacer.replacements] == [False, False, True]
+        assert replacer.process_content(b"a", "text/html") == b"b"
+        with open(replacer.config_file, encoding='utf-8') as f:
+            assert json.load(f) == {"replacements": rules}                                    # not replaced by the defaults
+
+    def test_save_config(self):
+        self.replacer.add_replacement("google", r"\bGoogle\b", "MODIFIED", flags=["IGNORECASE"])
+        with open(self.replacer.config_file, encoding='utf-8') as f:
+            saved = json.load(f)["replacements"]
+        assert [key for key in saved[0] if key.startswith("_")] == []
+        assert os.listdir(self.temp_dir.name) == ["replacements.json"]                 # the temp file was moved into place
+
+        os.chmod(self.replacer.config_file, 0o640)
+        self.replacer.save_config()
+        assert os.stat(self.replacer.config_file).st_mode & 0o777 == 0o640              # the temp file's 0600 isn't carried over
+
+        reloaded = ContentReplacer(data_dir=self.temp_dir.name)
+        assert reloaded.process_content(b"hello GOOGLE", "text/html") == b"hello MODIFIED"
@@ -0,0 +1,174 @@
+import os
+import gzip
+import json
+import base64
+import tempfile
+from unittest                         import TestCase
+from mitmproxy                        import hooks
+from mitmproxy.test                   import taddons, tflow
+from osbot_pyqt6.content_replacer     import ContentReplacer
+from osbot_pyqt6.start_mitmproxy      import ContentCaptureAddon, write_json, CAPTURE_METADATA_FILE
+
+
+class test_ContentCaptureAddon(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.entries  = []
+        self.addon    = ContentCaptureAddon(storage_dir=self.temp_dir.name, verbose=False,
+                                            enable_replacement=False, on_capture=self.entries.append)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_on_capture(self):
+        with taddons.context(self.addon):
+            flow = tflow.tflow(resp=True)
+            self.addon.response(flow)
+        assert len(self.entries) == 1
+        entry = self.entries[0]
+        assert entry["url"   ] == flow.request.pretty_url
+        assert entry["status"] == 200
+        assert entry["timestamp"] == self.addon.captured_flows[0]["timestamp"]
+        assert entry["content_modified"] is False
+
+    def test_stream_to_file(self):
+        with taddons.context(self.addon):
+            flow = tflow.tflow(resp=True)
+            flow.response.stream = True                             # what mitmproxy sets for bodies above stream_large_bodies
+            self.addon.responseheaders(flow)
+            assert callable(flow.response.stream)
+            for chunk in (b"abc", b"def", b""):
+                assert flow.response.stream(chunk) == chunk
+            flow.response.content = None                            # streamed bodies are not kept on the flow
+            self.addon.response(flow)
+
+        capture = self.addon.captured_flows[0]
+        assert capture["response"]["streamed"      ] is True
+        assert capture["response"]["content_length"] == 6
+        with open(capture["files"]["response"], 'rb') as f:
+            assert f.read() == b"abcdef"
+
+    def test_stream_to_file__replacement(self):
+        self.addon.content_replacer = ContentReplacer(data_dir=self.temp_dir.name)
+        self.addon.content_replacer.replacements = []
+        self.addon.content_replacer.add_replacement("hello", "hello", "goodbye")
+        with taddons.context(self.addon) as tctx:
+            tctx.options.replacement_enabled = True
+            flow = tflow.tflow(resp=True)
+            flow.response.headers["content-type"] = "text/html"
+            flow.response.stream = True
+            self.addon.responseheaders(flow)
+            assert "content-length" not in flow.response.headers
+            assert flow.response.headers["transfer-encoding"] == "chunked"
+            forwarded = [flow.response.stream(chunk) for chunk in (b"say ", b"hello", b"")]
+            assert b"".join(b"".join(chunk) if isinstance(chunk, list) else chunk for chunk in forwarded) == b"say goodbye"
+            assert [] in forwarded                                  # never an empty data frame before the end
+            flow.response.content = None
+            self.addon.response(flow)
+
+        capture = self.addon.captured_flows[0]
+        assert capture["response"]["content_modified"] is True
+        with open(capture["files"]["response"], 'rb') as f:
+            assert f.read() == b"say goodbye"
+
+    def test_stream_to_file__error(self):
+        with taddons.context(self.addon):
+            flow = tflow.tflow(resp=True)
+            flow.response.stream = True
+            self.addon.responseheaders(flow)
+            flow.response.stream(b"abc")
+            self.addon.error(flow)                                  # e.g. connection reset, the final b"" never arrives
+
+        assert self.addon.open_streams == {}
+        response_file = flow.metadata["capture_stream"]["file"]
+        assert os.path.exists(response_file) is False
+        with open(response_file + ".incomplete", 'rb') as f:
+            assert f.read() == b"abc"
+
+    def test_store_content(self):
+        self.addon.content_replacer = ContentReplacer(data_dir=self.temp_dir.name)
+        self.addon.content_replacer.replacements = []
+        self.addon.content_replacer.add_replacement("hello", "hello", "goodbye")
+        with taddons.context(self.addon) as tctx:
+            tctx.options.replacement_enabled = True
+            flow = tflow.tflow(resp=True)
+            flow.response.headers["content-type"] = "text/html"
+            flow.response.content = "<p>hello ✓</p>".encode()
+            flow.response.encode("gzip")
+            self.addon.response(flow)
+
+        capture = self.addon.captured_flows[0]
+        assert flow.response.content                         == "<p>goodbye ✓</p>".encode()
+        assert flow.response.headers["content-length"]       == str(len(flow.response.raw_content))
+        assert capture["response"]["content_modified"] is True
+        assert capture["response"]["content_length"]         == len("<p>goodbye ✓</p>".encode())
+        with open(capture["files"]["response"], 'rb') as f:
+            assert f.read() == "<p>goodbye ✓</p>".encode()
+
+    def test_on_ready(self):
+        ready = []
+        addon = ContentCaptureAddon(storage_dir=self.temp_dir.name, verbose=False, enable_replacement=False,
+                                    on_ready=lambda: ready.append(True))
+        with taddons.context(addon) as tctx:
+            tctx.master.addons.invoke_addon_sync(addon, hooks.RunningHook())
+        assert ready == [True]
+
+    def test_write_json(self):
+        path = os.path.join(self.temp_dir.name, "metadata.json")
+        data = {"url": "https://example.com/✓", "headers": {"a": "1"}, "content_length": 10}
+        write_json(path, data)
+        write_json(path, {"short": True})                          # rewrites truncate the previous content
+        with open(path, 'rb') as f:
+            assert json.loads(f.read()) == {"short": True}
+        write_json(path, data)
+        with open(path, 'rb') as f:
+            assert json.loads(f.read()) == data
+
+    def test_write_json__gz(self):
+        path = os.path.join(self.temp_dir.name, CAPTURE_METADATA_FILE)
+        data = {"url": "https://example.com/✓", "headers": {"a": "1"}, "content_length": 10}
+        write_json(path, data)
+        with gzip.open(path) as f:
+            assert json.loads(f.read()) == data
+
+    def test_log_flow(self):
+        addon = ContentCaptureAddon(storage_dir=self.temp_dir.name, verbose=False, enable_replacement=False,
+                                    capture_format="jsonl")
+        with taddons.context(addon):
+            for _ in range(2):
+                addon.response(tflow.tflow(resp=True))
+            addon.done()
+
+        assert sorted(os.listdir(self.temp_dir.name)) == ["index.tsv", f"session_{addon.session_id}.jsonl.gz"]
+        with gzip.open(os.path.join(self.temp_dir.name, f"session_{addon.session_id}.jsonl.gz")) as f:
+            records = [json.loads(line) for line in f]
+        assert len(records) == 2
+        assert records[0]["flow_id"] == addon.captured_flows[0]["flow_id"]
+        assert base64.b64decode(records[0]["response_body"]) == b"message"
+
+    def test_index_flow(self):
+        with taddons.context(self.addon):
+            for path in ("/a", "/b\tc"):
+                flow = tflow.tflow(resp=True)
+                flow.request.path = path
+                self.addon.response(flow)
+            self.addon.done()
+
+        with open(os.path.join(self.temp_dir.name, "index.tsv"), encoding='utf-8') as f:
+            lines = [line.rstrip("\n").split("\t", 3) for line in f]
+        assert lines == [[capture["timestamp"], "200", "0", capture["request"]["url"]]
+                         for capture in self.addon.captured_flows]
+        assert lines[1][3].endswith("/b\tc")
+
+    def test_json_stored_verbatim(self):
+        with taddons.context(self.addon):
+            flow = tflow.tflow(resp=True)
+            flow.response.headers["content-type"] = "application/json; charset=utf-8"
+            flow.response.content = b'{"a":1,  "b":[2,3]}'
+            self.addon.response(flow)
+
+        response_file = self.addon.captured_flows[0]["files"]["response"]
+        assert response_file.endswith("response.json")
+        with open(response_file, 'rb') as f:
+            assert f.read() == b'{"a":1,  "b":[2,3]}'